@@ -1,5 +1,8 @@
+import os
 import sys
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import chain
 
 # Import from modules
 from tssk.constants import VERSION, IS_DOCKER, GREEN, ORANGE, BLUE, RED, RESET
@@ -9,18 +12,54 @@ from tssk.config_loader import (
     ensure_output_directory,
     get_config_section
 )
-from tssk.utils import check_for_updates
+from tssk.utils import check_for_updates, report_update_check, debug_print
+from tssk.http_client import configure_http_client, get_rejected_requests
 from tssk.sonarr import (
     process_sonarr_url,
-    get_sonarr_series_and_tags
+    get_sonarr_series_and_tags,
+    iter_sonarr_episodes,
+    iter_sonarr_calendar_episodes
+)
+from tssk.episode_cache import get_episode_cache, prune_episode_cache, invalidate_cached_episodes
+from tssk.transitions import (
+    get_transition_index,
+    split_reusable_series,
+    record_transitions,
+    save_transition_index,
+    new_schedule,
+    track_next_transition,
+    note_unclassified_transitions,
+    note_next_midnight,
+    note_transition
+)
+from tssk.concurrency import new_concurrency_limiter, format_concurrency_summary, DEFAULT_MAX_CONCURRENCY
+from tssk.hedging import new_hedger, close_hedger, format_hedging_summary, DEFAULT_HEDGE_PERCENTILE, DEFAULT_HEDGE_BUDGET
+from tssk.instances import get_sonarr_instances, map_instances, merge_series, merge_category_results
+from tssk.prefilter import build_series_prefilter, get_window_padding, FUTURE_CATEGORIES, RECENT_CATEGORIES
+from tssk.columnar import numpy_available
+from tssk.scheduler import (
+    run_daemon,
+    get_next_event_time,
+    DEFAULT_CRON,
+    DEFAULT_MIN_INTERVAL_MINUTES,
+    DEFAULT_MAX_INTERVAL_HOURS
+)
+from tssk.webhook import (
+    start_webhook_receiver,
+    get_dirty_series,
+    clear_dirty_series,
+    WEBHOOK_SETTINGS,
+    DEFAULT_DEBOUNCE_SECONDS
 )
 from tssk.finders import (
-    find_new_season_shows,
-    find_upcoming_regular_episodes,
-    find_upcoming_finales,
-    find_recent_season_finales,
-    find_recent_final_episodes,
-    find_new_season_started
+    new_season_soon_classifier,
+    upcoming_episode_classifier,
+    upcoming_finale_classifier,
+    season_finale_classifier,
+    final_episode_classifier,
+    new_season_started_classifier,
+    iter_classified_series,
+    collect_category_results
 )
 from tssk.yaml_generators import (
     create_collection_yaml,
@@ -37,7 +76,11 @@ from tssk.yaml_generators import (
 from tssk.plex_integration import update_plex_sort_titles
 
 
-def main():
+def run_tssk(schedule=None):
+    """Run TSSK once, returning the exit code.
+
+    When a schedule (see new_schedule) is given, the first moment the output can change is collected in it.
+    """
     start_time = datetime.now()
     print(f"{BLUE}{'*' * 40}\n{'*' * 11} TSSK {VERSION} {'*' * 12}\n{'*' * 40}{RESET}")
     
@@ -46,9 +89,11 @@ def main():
     print(f"Docker mode: {IS_DOCKER}")
     print(f"Output directory: {output_dir}\n")
     
-    check_for_updates()
-
     config = load_config('config/config.yml')
+    configure_http_client(config)
+
+    # Runs in the background, the result is reported at the end of the run
+    update_check = check_for_updates(config)
     
     # Load localization settings
     localization = load_localization('config/localization.yml')
@@ -64,10 +109,21 @@ def main():
         print(f"{ORANGE}Localization file found but could not be loaded, using English defaults{RESET}\n")
     
     try:
-        # Process and validate Sonarr URL
+        # Process and validate the URL of every Sonarr instance
         sonarr_timeout = int(config.get('sonarr_timeout', 90))
-        sonarr_url = process_sonarr_url(config['sonarr_url'], config['sonarr_api_key'], sonarr_timeout)
-        sonarr_api_key = config['sonarr_api_key']
+        sonarr_concurrency = max(1, int(config.get('sonarr_concurrency', 1)))
+        adaptive_concurrency = str(config.get('sonarr_adaptive_concurrency', 'false')).lower() == 'true'
+        sonarr_max_concurrency = int(config.get('sonarr_max_concurrency', DEFAULT_MAX_CONCURRENCY))
+        sonarr_latency_target_ms = config.get('sonarr_latency_target_ms')
+        hedge_requests = str(config.get('sonarr_hedge_requests', 'false')).lower() == 'true'
+        hedge_percentile = float(config.get('sonarr_hedge_percentile', DEFAULT_HEDGE_PERCENTILE))
+        hedge_budget = float(config.get('sonarr_hedge_budget', DEFAULT_HEDGE_BUDGET))
+        sonarr_instances = get_sonarr_instances(config)
+        if len(sonarr_instances) > 1:
+            print(f"Sonarr instances (in order of precedence): {', '.join(instance['name'] for instance in sonarr_instances)}")
+        sonarr_urls = map_instances(
+            lambda instance: process_sonarr_url(instance['url'], instance['api_key'], sonarr_timeout), sonarr_instances
+        )
 
         # Get ignore_finales_tags configuration
         ignore_finales_tags_config = config.get('ignore_finales_tags', '')
@@ -92,6 +148,14 @@ def main():
         
         utc_offset = float(config.get('utc_offset', 0))
         skip_unmonitored = str(config.get("skip_unmonitored", "false")).lower() == "true"
+        sonarr_fetch_mode = str(config.get('sonarr_fetch_mode', 'series')).lower()
+        series_prefilter = str(config.get('series_prefilter', 'true')).lower() == 'true'
+        classification_engine = str(config.get('classification_engine', 'python')).lower()
+        if classification_engine == 'numpy' and not numpy_available():
+            print(f"{ORANGE}classification_engine is set to numpy but NumPy is not installed, using the python engine{RESET}")
+            classification_engine = 'python'
+        use_numpy = classification_engine == 'numpy'
+        webhook_enabled = str(config.get('webhook_enabled', 'false')).lower() == 'true'
         
         # Get process flags for each category (default to True if not specified)
         process_new_shows = str(config.get('process_new_shows', 'true')).lower() == 'true'
@@ -115,7 +179,15 @@ def main():
         print(f"recent_days_new_show: {recent_days_new_show}")
         print(f"skip_unmonitored: {skip_unmonitored}")
         print(f"ignore_finales_tags: {ignore_finales_tags}\n")
-        print(f"UTC offset: {utc_offset} hours\n")
+        print(f"UTC offset: {utc_offset} hours")
+        print(f"Sonarr fetch mode: {sonarr_fetch_mode}")
+        if adaptive_concurrency:
+            print(f"Sonarr concurrency: adaptive, starting at {sonarr_concurrency} (max {sonarr_max_concurrency})")
+        else:
+            print(f"Sonarr concurrency: {sonarr_concurrency}")
+        if hedge_requests:
+            print(f"Sonarr hedged requests: after p{hedge_percentile:g} latency, up to {hedge_budget:.0%} of requests")
+        print(f"Classification engine: {classification_engine}\n")
 
         # Plex configuration
         plex_url = config.get('plex_url', '')
@@ -131,8 +203,186 @@ def main():
                 print(f"Edit sort titles: {edit_sort_titles}")
                 print(f"  TV libraries: {tv_libraries}")
 
-        # Get series and tags from Sonarr in one call
-        all_series, tag_mapping = get_sonarr_series_and_tags(sonarr_url, sonarr_api_key, sonarr_timeout)
+        # Time window (in days) of every enabled episode-based category
+        category_windows = {category: days for category, days, enabled in [
+            ('new_season_soon', future_days_new_season, process_new_season_soon),
+            ('new_season_started', recent_days_new_season_started, process_new_season_started),
+            ('upcoming_episode', future_days_upcoming_episode, process_upcoming_episode),
+            ('upcoming_finale', future_days_upcoming_finale, process_upcoming_finale),
+            ('season_finale', recent_days_season_finale, process_season_finale),
+            ('final_episode', recent_days_final_episode, process_final_episode)
+        ] if enabled}
+
+        # Series that Sonarr reported events for through the webhook since the last run
+        dirty_series = {}
+        if webhook_enabled:
+            dirty_series = get_dirty_series()
+            if dirty_series:
+                print(f"Webhook: {len(dirty_series)} series changed since the last run")
+        dirty_series_ids = set(dirty_series)
+
+        def classify_sonarr_instance(instance_number):
+            """Fetch and classify the series of one Sonarr instance.
+
+            Returns a dict with its series, category results, schedule, limiter and hedger, and whether
+            its data is complete (no series list failure and no requests rejected by the circuit breaker
+            or the run deadline).
+            """
+            sonarr_url = sonarr_urls[instance_number]
+            sonarr_api_key = sonarr_instances[instance_number]['api_key']
+            instance_schedule = new_schedule() if schedule is not None else None
+            limiter = None
+            if adaptive_concurrency:
+                latency_target = float(sonarr_latency_target_ms) / 1000 if sonarr_latency_target_ms else None
+                limiter = new_concurrency_limiter(sonarr_concurrency, sonarr_max_concurrency, latency_target)
+            hedger = None
+            if hedge_requests:
+                hedger = new_hedger(limiter['maximum'] if limiter else sonarr_concurrency, hedge_percentile, hedge_budget)
+
+            # Get series and tags from Sonarr in one call
+            all_series, tag_mapping = get_sonarr_series_and_tags(sonarr_url, sonarr_api_key, sonarr_timeout)
+            series_fetched = all_series is not None
+            all_series = all_series or []
+
+            # Build a per-series classifier for every enabled episode-based category
+            classifiers = {}
+            if process_new_season_soon:
+                classifiers['new_season_soon'] = new_season_soon_classifier(
+                    tag_mapping, future_days_new_season, utc_offset, skip_unmonitored
+                )
+            if process_new_season_started:
+                classifiers['new_season_started'] = new_season_started_classifier(
+                    recent_days_new_season_started, utc_offset, skip_unmonitored
+                )
+            if process_upcoming_episode:
+                classifiers['upcoming_episode'] = upcoming_episode_classifier(
+                    future_days_upcoming_episode, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
+                )
+            if process_upcoming_finale:
+                classifiers['upcoming_finale'] = upcoming_finale_classifier(
+                    future_days_upcoming_finale, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
+                )
+            if process_season_finale:
+                classifiers['season_finale'] = season_finale_classifier(
+                    recent_days_season_finale, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
+                )
+            if process_final_episode:
+                classifiers['final_episode'] = final_episode_classifier(
+                    recent_days_final_episode, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
+                )
+
+            # Drop series that provably can't land in any enabled category before fetching their episodes
+            fetch_series = all_series
+            if classifiers and series_prefilter:
+                may_match = build_series_prefilter(category_windows, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping)
+                fetch_series = [series for series in all_series if may_match(series)]
+                debug_print(f"{BLUE}[DEBUG] Series pre-filter saved {len(all_series) - len(fetch_series)} of {len(all_series)} episode fetches{RESET}", config)
+
+            # Serve unchanged series from the on-disk episode cache when enabled
+            episode_cache = get_episode_cache(config, sonarr_url)
+            if episode_cache and all_series:
+                prune_episode_cache(episode_cache, all_series)
+                invalidate_cached_episodes(episode_cache, dirty_series_ids)
+
+            # Reuse last run's classification of series that can't have changed since
+            transition_index = None
+            if classifiers:
+                transition_index = get_transition_index(config, sonarr_url, {
+                    'category_windows': category_windows,
+                    'utc_offset': utc_offset,
+                    'skip_unmonitored': skip_unmonitored,
+                    'ignore_finales_tags': ignore_finales_tags
+                })
+            reused_series = []
+            fetch_ids = None
+            if transition_index:
+                reused_series, fetch_ids = split_reusable_series(transition_index, fetch_series, tag_mapping, dirty_series_ids)
+
+            # Stream each series' episodes from Sonarr straight into all classifiers
+            series_stream = None
+            if classifiers and sonarr_fetch_mode == 'calendar':
+                future_windows = [days for category, days in category_windows.items() if category in FUTURE_CATEGORIES]
+                recent_windows = [days for category, days in category_windows.items() if category in RECENT_CATEGORIES]
+            
+                now_utc = datetime.now(timezone.utc)
+                window_padding = get_window_padding(utc_offset)
+                calendar_start = now_utc - timedelta(days=max(recent_windows, default=0)) - window_padding
+                calendar_end = now_utc + timedelta(days=max(future_windows, default=0)) + window_padding
+            
+                # Only 'new season soon' can be decided from the calendar alone, the other categories need full seasons
+                full_episode_lists = any(category != 'new_season_soon' for category in classifiers)
+            
+                series_stream = iter_sonarr_calendar_episodes(
+                    sonarr_url, sonarr_api_key, fetch_series, calendar_start, calendar_end, sonarr_timeout, full_episode_lists,
+                    sonarr_concurrency, episode_cache, fetch_ids, limiter, hedger
+                )
+            elif classifiers:
+                print(f"{BLUE}Fetching and classifying episodes from Sonarr...{RESET}", flush=True)
+                series_stream = iter_sonarr_episodes(
+                    sonarr_url, sonarr_api_key, fetch_series, sonarr_timeout, sonarr_concurrency, fetch_ids, episode_cache, limiter,
+                    hedger
+                )
+
+            category_results = {category: ([], []) for category in classifiers}
+            if series_stream is not None:
+                classified_series = iter_classified_series(series_stream, classifiers, utc_offset, use_numpy)
+                if transition_index:
+                    classified_series = chain(
+                        reused_series,
+                        record_transitions(transition_index, classified_series, category_windows, utc_offset, tag_mapping)
+                    )
+                if instance_schedule is not None:
+                    classified_series = track_next_transition(
+                        instance_schedule, classified_series, category_windows, utc_offset, transition_index
+                    )
+                try:
+                    category_results = collect_category_results(classified_series, classifiers)
+                finally:
+                    # Also when a run fails, so the daemon doesn't keep the hedger's threads
+                    if hedger is not None:
+                        close_hedger(hedger)
+                if transition_index:
+                    save_transition_index(transition_index)
+                if sonarr_fetch_mode != 'calendar':
+                    print(f"{GREEN}Done ✓{RESET}\n")
+
+            if instance_schedule is not None:
+                note_unclassified_transitions(instance_schedule, all_series, category_windows, utc_offset)
+
+            return {
+                'all_series': all_series,
+                'category_results': category_results,
+                'schedule': instance_schedule,
+                'limiter': limiter,
+                'hedger': hedger,
+                'complete': series_fetched and not get_rejected_requests(sonarr_url)
+            }
+
+        # All instances are fetched and classified at the same time, so a run takes as long as the slowest one
+        instance_results = map_instances(classify_sonarr_instance, range(len(sonarr_instances)))
+        all_series = merge_series([result['all_series'] for result in instance_results])
+        category_results = merge_category_results([result['category_results'] for result in instance_results])
+
+        # Overwriting the YAMLs with what little came through an outage would empty the collections
+        incomplete_instances = [
+            instance['name'] for instance, result in zip(sonarr_instances, instance_results) if not result['complete']
+        ]
+        if incomplete_instances:
+            print(f"\n{ORANGE}Warning: Incomplete data from {', '.join(incomplete_instances)}, "
+                  f"keeping the .ymls and sort titles of the last complete run{RESET}")
+            return 1
+
+        # The dirty series are classified again and stored in the transition index, so a failed run keeps them
+        if dirty_series:
+            clear_dirty_series(dirty_series)
+
+        if schedule is not None:
+            for result in instance_results:
+                note_transition(schedule, result['schedule']['next_transition'])
+            # Relative dates in the overlays change at midnight
+            simplify_next_week_dates = str(config.get('simplify_next_week_dates', 'false')).lower() == 'true'
+            if simplify_next_week_dates and any(matched_shows for matched_shows, _ in category_results.values()):
+                note_next_midnight(schedule, utc_offset)
 
         # Track all tvdbIds to exclude from other categories
         all_excluded_tvdb_ids = set()
@@ -151,9 +401,7 @@ def main():
         skipped_shows = []
         matched_shows = []
         if process_new_season_soon:
-            matched_shows, skipped_shows = find_new_season_shows(
-                sonarr_url, sonarr_api_key, all_series, tag_mapping, future_days_new_season, utc_offset, skip_unmonitored
-            )
+            matched_shows, skipped_shows = category_results['new_season_soon']
 
             if matched_shows:
                 print(f"\n{GREEN}Shows with a new season starting within {future_days_new_season} days:{RESET}")
@@ -175,9 +423,7 @@ def main():
 
         # ---- New Season Started ----
         if process_new_season_started:
-            new_season_started_shows = find_new_season_started(
-                sonarr_url, sonarr_api_key, all_series, recent_days_new_season_started, utc_offset, skip_unmonitored
-            )
+            new_season_started_shows = category_results['new_season_started'][0]
             
             # Add to excluded IDs
             for show in new_season_started_shows:
@@ -197,9 +443,7 @@ def main():
 
         # ---- Upcoming Regular Episodes ----
         if process_upcoming_episode:
-            upcoming_eps, skipped_eps = find_upcoming_regular_episodes(
-                sonarr_url, sonarr_api_key, all_series, future_days_upcoming_episode, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
-            )
+            upcoming_eps = category_results['upcoming_episode'][0]
             
             # Filter out shows that are in the season finale or final episode categories
             upcoming_eps = [show for show in upcoming_eps if show.get('tvdbId') not in all_excluded_tvdb_ids]
@@ -217,9 +461,7 @@ def main():
 
         # ---- Upcoming Finale Episodes ----
         if process_upcoming_finale:
-            finale_eps, skipped_finales = find_upcoming_finales(
-                sonarr_url, sonarr_api_key, all_series, future_days_upcoming_finale, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
-            )
+            finale_eps = category_results['upcoming_finale'][0]
                     
             if finale_eps:
                 print(f"\n{GREEN}Shows with upcoming season finales within {future_days_upcoming_finale} days:{RESET}")
@@ -234,9 +476,7 @@ def main():
         
         # ---- Recent Season Finales ----
         if process_season_finale:
-            season_finale_shows = find_recent_season_finales(
-                sonarr_url, sonarr_api_key, all_series, recent_days_season_finale, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
-            )
+            season_finale_shows = category_results['season_finale'][0]
             
             # Add to excluded IDs
             for show in season_finale_shows:
@@ -256,9 +496,7 @@ def main():
         
         # ---- Recent Final Episodes ----
         if process_final_episode:
-            final_episode_shows = find_recent_final_episodes(
-                sonarr_url, sonarr_api_key, all_series, recent_days_final_episode, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping
-            )
+            final_episode_shows = category_results['final_episode'][0]
             
             # Add to excluded IDs
             for show in final_episode_shows:
@@ -330,6 +568,14 @@ def main():
             status = f"{GREEN}✓ Processed{RESET}" if enabled else f"{ORANGE}✗ Skipped{RESET}"
             print(f"{category:.<30} {status}")
         
+        # Concurrency limits picked and requests hedged for each Sonarr instance
+        for instance, result in zip(sonarr_instances, instance_results):
+            suffix = "" if len(sonarr_instances) == 1 else f" ({instance['name']})"
+            if result['limiter'] is not None:
+                print(f"Sonarr concurrency{suffix}: {format_concurrency_summary(result['limiter'])}")
+            if result['hedger'] is not None:
+                print(f"Sonarr hedged requests{suffix}: {format_hedging_summary(result['hedger'])}")
+
         print(f"\nRun completed")
 
         # Calculate and display runtime
@@ -339,14 +585,106 @@ def main():
         minutes, seconds = divmod(remainder, 60)
         runtime_formatted = f"{int(hours):02d}:{int(minutes):02d}:{int(seconds):02d}"
         
-        print(f"Total runtime: {runtime_formatted}")
+        print(f"Total runtime: {runtime_formatted}\n")
+        report_update_check(update_check)
+        return 0
 
     except ConnectionError as e:
         print(f"{RED}Error: {str(e)}{RESET}")
-        sys.exit(1)
+        return 1
     except Exception as e:
         print(f"{RED}Unexpected error: {str(e)}{RESET}")
-        sys.exit(1)
+        return 1
+
+
+def create_daemon(cron_expression, run_requested):
+    """Create the run, get_next_run and get_debounce_seconds functions of the daemon.
+
+    Its settings (schedule_mode and its intervals, the webhook settings) are re-read from config.yml
+    after every run, so changes apply from the next run on; the webhook receiver is restarted when
+    its settings change. A config.yml that can't be read (e.g. while it is being edited) keeps the
+    last good settings. Events received by the webhook set run_requested.
+    """
+    schedule = new_schedule()
+    daemon = {
+        'settings': {
+            'schedule_mode': 'cron',
+            'min_interval_minutes': DEFAULT_MIN_INTERVAL_MINUTES,
+            'max_interval_hours': DEFAULT_MAX_INTERVAL_HOURS,
+            'debounce_seconds': DEFAULT_DEBOUNCE_SECONDS
+        },
+        'schedule_mode': None,
+        'webhook_settings': None,
+        'webhook_server': None
+    }
+
+    def reload_settings():
+        try:
+            config = load_config('config/config.yml')
+            settings = {
+                'schedule_mode': str(config.get('schedule_mode', 'cron')).lower(),
+                'min_interval_minutes': float(config.get('schedule_min_interval_minutes', DEFAULT_MIN_INTERVAL_MINUTES)),
+                'max_interval_hours': float(config.get('schedule_max_interval_hours', DEFAULT_MAX_INTERVAL_HOURS)),
+                'debounce_seconds': float(config.get('webhook_debounce_seconds', DEFAULT_DEBOUNCE_SECONDS))
+            }
+            webhook_settings = {key: config.get(key) for key in WEBHOOK_SETTINGS}
+        except (SystemExit, ValueError, TypeError, AttributeError):
+            print(f"{ORANGE}Warning: Could not read the daemon settings from config.yml, keeping the last ones{RESET}")
+            return
+        daemon['settings'] = settings
+
+        if settings['schedule_mode'] != daemon['schedule_mode']:
+            daemon['schedule_mode'] = settings['schedule_mode']
+            if settings['schedule_mode'] == 'events':
+                print(f"{BLUE}Scheduling runs when category output changes{RESET}")
+            else:
+                print(f"{BLUE}Scheduling runs with cron schedule: {cron_expression}{RESET}")
+
+        if webhook_settings != daemon['webhook_settings']:
+            daemon['webhook_settings'] = webhook_settings
+            if daemon['webhook_server'] is not None:
+                daemon['webhook_server'].shutdown()
+                daemon['webhook_server'].server_close()
+                print(f"{BLUE}Webhook settings changed, webhook receiver stopped{RESET}")
+            daemon['webhook_server'] = start_webhook_receiver(config, run_requested.set)
+
+    def run():
+        # In events mode the next run is when category output next changes, instead of the CRON schedule
+        if daemon['schedule_mode'] != 'events':
+            return run_tssk()
+        schedule.update(new_schedule())
+        exit_code = run_tssk(schedule)
+        if exit_code:
+            # Retry a failed run after the minimum interval
+            schedule['next_transition'] = datetime.now(timezone.utc)
+        return exit_code
+
+    def get_next_run():
+        reload_settings()
+        if daemon['schedule_mode'] != 'events':
+            return None
+        settings = daemon['settings']
+        return get_next_event_time(
+            schedule['next_transition'], settings['min_interval_minutes'], settings['max_interval_hours']
+        )
+
+    def get_debounce_seconds():
+        return daemon['settings']['debounce_seconds']
+
+    reload_settings()
+    return run, get_next_run, get_debounce_seconds
+
+
+def main():
+    # --daemon keeps the process alive and runs on the CRON schedule instead of exiting
+    if '--daemon' in sys.argv[1:]:
+        cron_expression = os.environ.get('CRON', DEFAULT_CRON)
+        # Sonarr events received by the webhook request an early run
+        run_requested = threading.Event()
+        run, get_next_run, get_debounce_seconds = create_daemon(cron_expression, run_requested)
+        sys.exit(run_daemon(run, cron_expression, run_requested, get_next_run=get_next_run,
+                            get_debounce_seconds=get_debounce_seconds))
+    sys.exit(run_tssk())
 
 
 if __name__ == "__main__":
@@ -43,6 +43,15 @@ chmod -R 755 "${OUTPUT_DIR}" 2>/dev/null || true
 # Export for Python script to use
 export TSSK_OUTPUT_DIR="${OUTPUT_DIR}"
 
+# Daemon mode: one long-lived TSSK process runs on the CRON schedule itself, no cron daemon needed
+if [ "${DAEMON:-false}" = "true" ]; then
+    export TZ="${TZ:-UTC}"
+    export DOCKER=true
+    log "${BLUE}TSSK is starting in daemon mode with the following cron schedule: ${CRON}${NC}"
+    cd /app
+    exec /usr/local/bin/python TSSK.py --daemon
+fi
+
 # Create a helper script for output directory detection
 cat > /app/detect-output-dir.sh << 'DETECT_EOF'
 #!/bin/bash
@@ -0,0 +1,125 @@
+"""Tests for the Sonarr webhook receiver, POSTing the fixture payloads in fixtures/webhook to a local receiver"""
+
+import http.client
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tssk.webhook import get_event_series_ids, get_dirty_series, clear_dirty_series, start_webhook_receiver  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'webhook')
+
+TOKEN = 'fixture-token'
+
+# Series id each fixture payload is about
+FIXTURE_SERIES_IDS = {
+    'download.json': {12},
+    'series_add.json': {34},
+    'series_delete.json': {56},
+    'episode_file_delete.json': {12},
+    'rename.json': {78},
+    'test.json': set()
+}
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class WebhookTest(unittest.TestCase):
+    def setUp(self):
+        # The dirty set is kept under config/cache in the working directory
+        self.previous_cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+        self.events = threading.Semaphore(0)
+        self.server = start_webhook_receiver(
+            {'webhook_enabled': 'true', 'webhook_port': 0, 'webhook_token': TOKEN}, self.events.release
+        )
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        os.chdir(self.previous_cwd)
+        self.temp_dir.cleanup()
+
+    def post(self, name, **kwargs):
+        return requests.post(self.url, json=load_fixture(name), timeout=10, **kwargs)
+
+    def test_event_series_ids(self):
+        for name, series_ids in FIXTURE_SERIES_IDS.items():
+            with self.subTest(name):
+                self.assertEqual(get_event_series_ids(load_fixture(name)), series_ids)
+
+    def test_requests_without_token_are_rejected(self):
+        for name in FIXTURE_SERIES_IDS:
+            with self.subTest(name):
+                self.assertEqual(self.post(name).status_code, 401)
+                self.assertEqual(self.post(name, auth=('', 'wrong-token')).status_code, 401)
+        self.assertEqual(get_dirty_series(), {})
+
+    def test_requests_with_token_mark_series_dirty(self):
+        for name in FIXTURE_SERIES_IDS:
+            with self.subTest(name):
+                # Sonarr sends the token as the Webhook connection's password, or in the URL
+                self.assertEqual(self.post(name, auth=('', TOKEN)).status_code, 200)
+                self.assertEqual(self.post(name, params={'token': TOKEN}).status_code, 200)
+
+        expected = set().union(*FIXTURE_SERIES_IDS.values())
+        self.assertEqual(set(get_dirty_series()), expected)
+        # Every event about a series requests a run, Test events don't
+        events = sum(2 for series_ids in FIXTURE_SERIES_IDS.values() if series_ids)
+        for _ in range(events):
+            self.assertTrue(self.events.acquire(timeout=5))
+        self.assertFalse(self.events.acquire(timeout=0.1))
+
+    def test_invalid_content_length_is_rejected(self):
+        # requests always sends the real length, so the request is put together by hand
+        for content_length in ('-1', 'abc', None):
+            with self.subTest(content_length):
+                connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=5)
+                connection.putrequest('POST', f"/?token={TOKEN}")
+                if content_length is not None:
+                    connection.putheader('Content-Length', content_length)
+                connection.endheaders(b'{}')
+                self.assertEqual(connection.getresponse().status, 400)
+                connection.close()
+
+    def test_clear_dirty_series(self):
+        for name in ('download.json', 'series_add.json'):
+            self.post(name, auth=('', TOKEN))
+        dirty_series = get_dirty_series()
+        self.assertEqual(set(dirty_series), {12, 34})
+
+        clear_dirty_series(dirty_series)
+        self.assertEqual(get_dirty_series(), {})
+
+    def test_series_marked_again_during_a_run_stay_dirty(self):
+        for name in ('download.json', 'series_add.json'):
+            self.post(name, auth=('', TOKEN))
+        # What a run reads when it starts
+        dirty_series = get_dirty_series()
+
+        # Sonarr deletes an episode file of series 12 and deletes series 56 while the run is busy
+        time.sleep(0.01)
+        self.post('episode_file_delete.json', auth=('', TOKEN))
+        self.post('series_delete.json', auth=('', TOKEN))
+
+        clear_dirty_series(dirty_series)
+        self.assertEqual(set(get_dirty_series()), {12, 56})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+"""Optional NumPy engine for TSSK - builds the timelines of a batch of series with vectorized ops"""
+
+from datetime import timedelta
+
+from .timeline import get_episode_air_date, get_air_date_key, format_air_date_key, build_series_timeline
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Number of series whose episodes are loaded into one set of columns
+COLUMNAR_BATCH_SERIES = 500
+
+
+def numpy_available():
+    """Check whether the NumPy engine can be used"""
+    return np is not None
+
+
+def _get_air_date_keys(air_date_strs):
+    """Vectorized get_air_date_key"""
+    air_date_strs = np.array(air_date_strs)
+    # Casting to 19 characters drops the 'Z' of Sonarr's usual format
+    air_date_keys = air_date_strs.astype('<U19')
+    irregular = np.flatnonzero(
+        (np.char.str_len(air_date_strs) != 20) | ~np.char.endswith(air_date_strs, 'Z')
+        | ~np.char.endswith(air_date_strs.astype('<U11'), 'T')
+    )
+    if len(irregular):
+        air_date_keys = air_date_keys.astype(object)
+        for i in irregular.tolist():
+            air_date_keys[i] = get_air_date_key(air_date_strs[i])
+    return air_date_keys
+
+
+def _first_per_group(groups, candidates):
+    """Map each group to the first of its candidate positions, in the order the candidates are given"""
+    unique_groups, first = np.unique(groups[candidates], return_index=True)
+    return dict(zip(unique_groups.tolist(), candidates[first].tolist()))
+
+
+def build_series_timelines(episode_lists, now_local, utc_offset=0):
+    """Build the timelines of many series at once, the same as build_series_timeline would for each.
+
+    All regular episodes of the batch are loaded into columns (series, season, episode number,
+    air date key, hasFile) and per-season counts, finale numbers, next future episodes and the
+    downloaded episodes of each latest season are found with grouped array operations.
+    """
+    episodes = []
+    series_sizes = []
+    for series_episodes in episode_lists:
+        regular_episodes = [ep for ep in series_episodes if ep.get('seasonNumber', 0) > 0]
+        episodes.extend(regular_episodes)
+        series_sizes.append(len(regular_episodes))
+
+    timelines = [{
+        'seasons': {},
+        'next_future': None,
+        'season_finales': [],
+        'latest_season': None,
+        'last_downloaded': None,
+        'first_of_latest_season': None
+    } for _ in episode_lists]
+    if not episodes:
+        return timelines
+
+    count = len(episodes)
+    series_index = np.repeat(np.arange(len(episode_lists)), series_sizes)
+    season = np.fromiter((ep['seasonNumber'] for ep in episodes), dtype=np.int64, count=count)
+    has_number = np.fromiter((ep.get('episodeNumber') is not None for ep in episodes), dtype=bool, count=count)
+    episode_number = np.fromiter((ep.get('episodeNumber') or 0 for ep in episodes), dtype=np.int64, count=count)
+    has_file = np.fromiter((bool(ep.get('hasFile', False)) for ep in episodes), dtype=bool, count=count)
+    air_date_strs = [ep.get('airDateUtc') for ep in episodes]
+    has_air_date = np.fromiter((bool(air_date_str) for air_date_str in air_date_strs), dtype=bool, count=count)
+
+    # Group by (series, season) - keys are sorted by series and then season
+    season_key = series_index * (int(season.max()) + 1) + season
+    keys, key_first, key_of_episode, episode_count = np.unique(
+        season_key, return_index=True, return_inverse=True, return_counts=True
+    )
+    key_series = series_index[key_first]
+    key_season = season[key_first]
+    max_episode = np.full(len(keys), np.iinfo(np.int64).min)
+    np.maximum.at(max_episode, key_of_episode, episode_number)
+    downloaded_count = np.bincount(key_of_episode, weights=has_file, minlength=len(keys)).astype(np.int64)
+
+    # Seasons in the order they first appear in each series' episode list
+    for key in np.lexsort((key_first, key_series)).tolist():
+        timelines[key_series[key]]['seasons'][int(key_season[key])] = {
+            'episode_count': int(episode_count[key]),
+            'max_episode': int(max_episode[key]),
+            'downloaded_count': int(downloaded_count[key])
+        }
+
+    # Next future episode: earliest air date that isn't downloaded, first in episode order on ties
+    future = np.flatnonzero(~has_file & has_air_date)
+    if len(future):
+        air_date_key = _get_air_date_keys([air_date_strs[i] for i in future.tolist()])
+        in_future = air_date_key > format_air_date_key(now_local - timedelta(hours=utc_offset))
+        future, air_date_key = future[in_future], air_date_key[in_future]
+        by_air_time = future[np.lexsort((future, air_date_key, series_index[future]))]
+        for index, position in _first_per_group(series_index, by_air_time).items():
+            ep = episodes[position]
+            timelines[index]['next_future'] = (ep, get_episode_air_date(ep, utc_offset))
+
+    # Downloaded finales of seasons with more than one episode
+    finale_candidates = np.flatnonzero(
+        has_file & has_number & (episode_number == max_episode[key_of_episode]) & (episode_count[key_of_episode] > 1)
+    )
+    for key, position in sorted(_first_per_group(key_of_episode, finale_candidates).items(),
+                                key=lambda item: (key_series[item[0]], key_first[item[0]])):
+        ep = episodes[position]
+        timelines[key_series[key]]['season_finales'].append(
+            (int(key_season[key]), int(max_episode[key]), ep, get_episode_air_date(ep, utc_offset))
+        )
+
+    # Highest season with downloads - the last such key of each series, as keys are sorted
+    downloaded_keys = np.flatnonzero(downloaded_count > 0)
+    if len(downloaded_keys):
+        reversed_keys = downloaded_keys[::-1]
+        unique_series, last = np.unique(key_series[reversed_keys], return_index=True)
+        latest_key = np.full(len(episode_lists), -1)
+        latest_key[unique_series] = reversed_keys[last]
+        for index in unique_series.tolist():
+            timelines[index]['latest_season'] = int(key_season[latest_key[index]])
+
+        latest = np.flatnonzero(has_file & (key_of_episode == latest_key[series_index]))
+        latest_series = series_index[latest]
+        max_downloaded = np.full(len(episode_lists), np.iinfo(np.int64).min)
+        np.maximum.at(max_downloaded, latest_series, episode_number[latest])
+        min_number = np.where(has_number, episode_number, 999)
+        min_downloaded = np.full(len(episode_lists), np.iinfo(np.int64).max)
+        np.minimum.at(min_downloaded, latest_series, min_number[latest])
+
+        last_candidates = latest[has_number[latest] & (episode_number[latest] == max_downloaded[latest_series])]
+        for index, position in _first_per_group(series_index, last_candidates).items():
+            ep = episodes[position]
+            timelines[index]['last_downloaded'] = (ep, get_episode_air_date(ep, utc_offset))
+
+        first_candidates = latest[min_number[latest] == min_downloaded[latest_series]]
+        for index, position in _first_per_group(series_index, first_candidates).items():
+            ep = episodes[position]
+            timelines[index]['first_of_latest_season'] = (ep, get_episode_air_date(ep, utc_offset))
+
+    return timelines
+
+
+def iter_series_timelines(series_stream, now_local, utc_offset=0, use_numpy=False):
+    """Yield (index, series, timeline) for every (index, series, episodes) in the stream.
+
+    timeline is None when episodes is None, i.e. they couldn't be fetched. With use_numpy the stream is read in batches of COLUMNAR_BATCH_SERIES series, which keeps
+    memory bounded while still giving NumPy large enough columns to work on.
+    """
+    if not use_numpy:
+        for index, series, episodes in series_stream:
+            timeline = build_series_timeline(episodes, now_local, utc_offset) if episodes is not None else None
+            yield index, series, timeline
+        return
+
+    batch = []
+    for item in series_stream:
+        batch.append(item)
+        if len(batch) >= COLUMNAR_BATCH_SERIES:
+            yield from _iter_batch_timelines(batch, now_local, utc_offset)
+            batch = []
+    if batch:
+        yield from _iter_batch_timelines(batch, now_local, utc_offset)
+
+
+def _iter_batch_timelines(batch, now_local, utc_offset):
+    timelines = build_series_timelines([episodes or [] for _, _, episodes in batch], now_local, utc_offset)
+    for (index, series, episodes), timeline in zip(batch, timelines):
+        yield index, series, timeline if episodes is not None else None
@@ -0,0 +1,93 @@
+"""Adaptive concurrency for TSSK - tunes the number of requests in flight to how fast Sonarr answers"""
+
+
+DEFAULT_MAX_CONCURRENCY = 32
+
+# Fewest completed requests a limit is judged on
+MIN_WINDOW = 16
+# The limit is cut when a window's p95 latency exceeds the baseline by this factor...
+LATENCY_TOLERANCE = 2.0
+# ...or when more than this share of its requests failed
+MAX_ERROR_RATE = 0.05
+# How fast the baseline follows windows with a lower p95 - slowly, so one lucky window doesn't set it
+BASELINE_WEIGHT = 0.1
+LATENCY_DECREASE_FACTOR = 0.75
+ERROR_DECREASE_FACTOR = 0.5
+
+
+def new_concurrency_limiter(initial, maximum=DEFAULT_MAX_CONCURRENCY, latency_target=None):
+    """Create an AIMD limiter starting at initial requests in flight.
+
+    latency_target is the p95 latency (in seconds) above which the limit is cut. Without one, the
+    target is LATENCY_TOLERANCE times a baseline p95 that starts at the first window's and drifts
+    down towards lower ones, so no tuning per host is needed.
+    """
+    maximum = max(1, int(maximum))
+    initial = min(max(1, int(initial)), maximum)
+    return {
+        'limit': float(initial),
+        'maximum': maximum,
+        'latency_target': latency_target,
+        'baseline_p95': None,
+        'latencies': [],
+        'errors': 0,
+        'initial': initial,
+        'lowest': initial,
+        'highest': initial,
+        'increases': 0,
+        'decreases': 0
+    }
+
+
+def get_concurrency_limit(limiter):
+    """Get the current number of requests allowed in flight"""
+    return int(limiter['limit'])
+
+
+def _get_p95(latencies):
+    ordered = sorted(latencies)
+    return ordered[int(0.95 * (len(ordered) - 1))]
+
+
+def record_request(limiter, latency, failed=False):
+    """Record a completed request and adjust the limit once a full window of requests is in.
+
+    Additive increase: +1 while latency and error rate stay within target.
+    Multiplicative decrease: on too many failures (timeouts, 5xx) or a latency jump.
+    """
+    limiter['latencies'].append(latency)
+    limiter['errors'] += failed
+    if len(limiter['latencies']) < max(MIN_WINDOW, get_concurrency_limit(limiter)):
+        return
+
+    p95 = _get_p95(limiter['latencies'])
+    error_rate = limiter['errors'] / len(limiter['latencies'])
+    limiter['latencies'] = []
+    limiter['errors'] = 0
+    if limiter['baseline_p95'] is None:
+        limiter['baseline_p95'] = p95
+    elif p95 < limiter['baseline_p95']:
+        limiter['baseline_p95'] += (p95 - limiter['baseline_p95']) * BASELINE_WEIGHT
+    latency_target = limiter['latency_target'] or limiter['baseline_p95'] * LATENCY_TOLERANCE
+
+    if error_rate > MAX_ERROR_RATE:
+        limiter['limit'] = max(1.0, limiter['limit'] * ERROR_DECREASE_FACTOR)
+        limiter['decreases'] += 1
+    elif p95 > latency_target:
+        limiter['limit'] = max(1.0, limiter['limit'] * LATENCY_DECREASE_FACTOR)
+        limiter['decreases'] += 1
+    elif limiter['limit'] < limiter['maximum']:
+        limiter['limit'] = min(float(limiter['maximum']), limiter['limit'] + 1)
+        limiter['increases'] += 1
+
+    limit = get_concurrency_limit(limiter)
+    limiter['lowest'] = min(limiter['lowest'], limit)
+    limiter['highest'] = max(limiter['highest'], limit)
+
+
+def format_concurrency_summary(limiter):
+    """Describe the limits the limiter picked, for the run summary"""
+    return (
+        f"started at {limiter['initial']}, ended at {get_concurrency_limit(limiter)} "
+        f"(range {limiter['lowest']}-{limiter['highest']}, {limiter['increases']} increases, {limiter['decreases']} decreases)"
+    )
@@ -1,5 +1,7 @@
 """Configuration loading and management for TSSK"""
 
+import copy
+import hashlib
 import os
 import sys
 import yaml
@@ -59,11 +61,36 @@ def ensure_output_directory():
         sys.exit(1)
 
 
+def get_cache_directory(*subdirectories):
+    """Get (and create) the directory TSSK keeps its state and caches in between runs"""
+    cache_dir = os.path.join('config', 'cache', *subdirectories)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def get_instance_key(url):
+    """Get a short, file name safe key for the state kept per Sonarr (or Plex) instance"""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+
+
+# Parsed config files by path, as (mtime, config), so a long-running process only re-reads changed files
+_loaded_configs = {}
+
+
 def load_config(file_path='config/config.yml'):
-    """Load the main configuration file"""
+    """Load the main configuration file, re-reading it only when it was modified since the last load"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return yaml.safe_load(file)
+        mtime = os.stat(file_path).st_mtime_ns
+        loaded = _loaded_configs.get(file_path)
+        if loaded is None or loaded[0] != mtime:
+            with open(file_path, 'r', encoding='utf-8') as file:
+                config = yaml.safe_load(file)
+            if loaded is not None:
+                print(f"{GREEN}Config file '{file_path}' changed, reloaded{RESET}")
+            loaded = (mtime, config)
+            _loaded_configs[file_path] = loaded
+        # Callers may modify their config, the cached one stays as it was read
+        return copy.deepcopy(loaded[1])
     except FileNotFoundError:
         print(f"Config file '{file_path}' not found.")
         sys.exit(1)
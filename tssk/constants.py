@@ -8,6 +8,11 @@ VERSION = "2026.03.16"
 # Environment detection
 IS_DOCKER = os.getenv("DOCKER", "false").lower() == "true"
 
+# Plex requests at the same time: library pages read (over all libraries) and sort title writes.
+# Every write is a transaction on Plex's SQLite database, so they are spread out rather than sent all at once.
+DEFAULT_SCAN_CONCURRENCY = 4
+DEFAULT_WRITE_CONCURRENCY = 4
+
 # ANSI color codes
 GREEN = '\033[32m'
 ORANGE = '\033[33m'
@@ -0,0 +1,103 @@
+"""Persistent on-disk episode cache for TSSK"""
+
+import json
+import os
+import time
+
+from .constants import ORANGE, RESET
+from .config_loader import get_cache_directory, get_instance_key
+
+
+DEFAULT_MAX_AGE_HOURS = 72
+
+
+def get_episode_cache(config, sonarr_url):
+    """Get the episode cache settings for a Sonarr instance, or None if the cache is disabled"""
+    if str(config.get('episode_cache', 'false')).lower() != 'true':
+        return None
+
+    # Separate folder per Sonarr instance, as series ids are only unique within one instance
+    return {
+        'directory': get_cache_directory('episodes', get_instance_key(sonarr_url)),
+        'max_age_hours': float(config.get('episode_cache_max_age_hours', DEFAULT_MAX_AGE_HOURS))
+    }
+
+
+def get_series_fingerprint(series):
+    """Build a fingerprint from the /series fields that change whenever a series' episodes change"""
+    statistics = series.get('statistics', {})
+    return json.dumps([
+        series.get('monitored'),
+        series.get('previousAiring'),
+        series.get('nextAiring'),
+        statistics.get('episodeCount'),
+        statistics.get('totalEpisodeCount'),
+        statistics.get('episodeFileCount'),
+        statistics.get('sizeOnDisk'),
+        sorted((season.get('seasonNumber'), season.get('monitored')) for season in series.get('seasons', []))
+    ])
+
+
+def _get_cache_file(episode_cache, series_id):
+    return os.path.join(episode_cache['directory'], f"{series_id}.json")
+
+
+def load_cached_episodes(episode_cache, series):
+    """Return the cached episodes of a series, or None if they are missing, changed or too old"""
+    try:
+        with open(_get_cache_file(episode_cache, series['id']), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get('fingerprint') != get_series_fingerprint(series):
+        return None
+
+    # Stagger the safety refresh over the last quarter of the max age, so series cached
+    # in the same run don't all expire in the same run again
+    max_age_seconds = episode_cache['max_age_hours'] * 3600
+    max_age_seconds *= 0.75 + (series['id'] % 16) / 64
+    if time.time() - cached.get('fetched_at', 0) > max_age_seconds:
+        return None
+
+    return cached.get('episodes')
+
+
+def save_cached_episodes(episode_cache, series, episodes):
+    """Store the episodes of a series together with its current fingerprint"""
+    cache_file = _get_cache_file(episode_cache, series['id'])
+    cached = {
+        'fingerprint': get_series_fingerprint(series),
+        'fetched_at': time.time(),
+        'episodes': episodes
+    }
+    try:
+        temp_file = f"{cache_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(cached, f, separators=(',', ':'))
+        os.replace(temp_file, cache_file)
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not write episode cache for series {series['id']}: {str(e)}{RESET}")
+
+
+def invalidate_cached_episodes(episode_cache, series_ids):
+    """Remove the cached episodes of the given series, so they are fetched again"""
+    for series_id in series_ids:
+        try:
+            os.remove(_get_cache_file(episode_cache, series_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"{ORANGE}Warning: Could not remove cached episodes of series {series_id}: {str(e)}{RESET}")
+
+
+def prune_episode_cache(episode_cache, all_series):
+    """Remove cached episodes of series that are no longer in Sonarr"""
+    series_ids = {str(series['id']) for series in all_series}
+    try:
+        for file_name in os.listdir(episode_cache['directory']):
+            series_id, _ = os.path.splitext(file_name)
+            if series_id not in series_ids:
+                os.remove(os.path.join(episode_cache['directory'], file_name))
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not clean up episode cache: {str(e)}{RESET}")
@@ -1,48 +1,23 @@
 """Show finding functions for TSSK"""
 
 from datetime import datetime, timedelta, timezone
-from collections import defaultdict
 
-from .utils import convert_utc_to_local
-from .sonarr import get_sonarr_episodes, has_ignore_finale_tag
+from .sonarr import has_ignore_finale_tag
+from .columnar import iter_series_timelines
 
 
-def find_new_season_shows(sonarr_url, api_key, all_series, tag_mapping, future_days_new_season, utc_offset=0, skip_unmonitored=False):
-    """Find shows with a new season starting within the specified days"""
+def new_season_soon_classifier(tag_mapping, future_days_new_season, utc_offset=0, skip_unmonitored=False):
+    """Create a per-series classifier for shows with a new season starting within the specified days"""
     cutoff_date = datetime.now(timezone.utc) + timedelta(days=future_days_new_season)
-    now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
-    matched_shows = []
-    skipped_shows = []
     
-    for series in all_series:
-        episodes = get_sonarr_episodes(sonarr_url, api_key, series['id'])
-        
-        future_episodes = []
-        for ep in episodes:
-            # Skip specials (season 0)
-            season_number = ep.get('seasonNumber', 0)
-            if season_number == 0:
-                continue
-                
-            air_date_str = ep.get('airDateUtc')
-            if not air_date_str:
-                continue
-            
-            air_date = convert_utc_to_local(air_date_str, utc_offset)
-            
-            # Skip episodes that have already been downloaded - they should be treated as if they've aired
-            if ep.get('hasFile', False):
-                continue
-                
-            if air_date > now_local:
-                future_episodes.append((ep, air_date))
-        
-        future_episodes.sort(key=lambda x: x[1])
+    def classify(series, timeline):
+        matched_shows = []
+        skipped_shows = []
         
-        if not future_episodes:
-            continue
+        if not timeline['next_future']:
+            return matched_shows, skipped_shows
         
-        next_future, air_date_next = future_episodes[0]
+        next_future, air_date_next = timeline['next_future']
         
         # Check if this is a new season starting (episode 1 of any season)
         # AND check that it's not a completely new show (season 1)
@@ -73,7 +48,7 @@ def find_new_season_shows(sonarr_url, api_key, all_series, tag_mapping, future_d
                 
                 if not episode_monitored or not season_monitored:
                     skipped_shows.append(show_dict)
-                    continue
+                    return matched_shows, skipped_shows
             
             matched_shows.append(show_dict)
         # If it's a completely new show (Season 1), add it to skipped shows for reporting
@@ -95,75 +70,40 @@ def find_new_season_shows(sonarr_url, api_key, all_series, tag_mapping, future_d
             }
             
             skipped_shows.append(show_dict)
+        
+        return matched_shows, skipped_shows
     
-    return matched_shows, skipped_shows
+    return classify
 
 
-def find_upcoming_regular_episodes(sonarr_url, api_key, all_series, future_days_upcoming_episode, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
-    """Find shows with upcoming non-premiere, non-finale episodes within the specified days"""
+def upcoming_episode_classifier(future_days_upcoming_episode, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Create a per-series classifier for shows with upcoming non-premiere, non-finale episodes within the specified days"""
     cutoff_date = datetime.now(timezone.utc) + timedelta(days=future_days_upcoming_episode)
-    now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
-    matched_shows = []
-    skipped_shows = []
     
-    for series in all_series:
-        episodes = get_sonarr_episodes(sonarr_url, api_key, series['id'])
-        
-        # Check if this series should ignore finale detection
-        should_ignore_finales = has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping)
-        
-        # Group episodes by season
-        seasons = defaultdict(list)
-        for ep in episodes:
-            if ep.get('seasonNumber') > 0:  # Skip specials
-                seasons[ep.get('seasonNumber')].append(ep)
-        
-        # For each season, find the max episode number to identify finales
-        season_finales = {}
-        if not should_ignore_finales:
-            for season_num, season_eps in seasons.items():
-                if season_eps:
-                    max_ep = max(ep.get('episodeNumber', 0) for ep in season_eps)
-                    season_finales[season_num] = max_ep
-        
-        future_episodes = []
-        for ep in episodes:
-            # Skip specials (season 0)
-            season_number = ep.get('seasonNumber', 0)
-            if season_number == 0:
-                continue
-                
-            air_date_str = ep.get('airDateUtc')
-            if not air_date_str:
-                continue
-            
-            air_date = convert_utc_to_local(air_date_str, utc_offset)
-            
-            # Skip episodes that have already been downloaded - they should be treated as if they've aired
-            if ep.get('hasFile', False):
-                continue
-                
-            if air_date > now_local and air_date <= cutoff_date:
-                future_episodes.append((ep, air_date))
+    def classify(series, timeline):
+        matched_shows = []
+        skipped_shows = []
         
-        future_episodes.sort(key=lambda x: x[1])
+        if not timeline['next_future']:
+            return matched_shows, skipped_shows
         
-        if not future_episodes:
-            continue
+        # Only the next future episode can be the first one within the window
+        next_future, air_date = timeline['next_future']
+        if air_date > cutoff_date:
+            return matched_shows, skipped_shows
         
-        next_future, air_date = future_episodes[0]
         season_num = next_future.get('seasonNumber')
         episode_num = next_future.get('episodeNumber')
         
         # Skip season premieres (episode 1 of any season)
         if episode_num == 1:
-            continue
+            return matched_shows, skipped_shows
             
         # Skip season finales (only if not ignoring finales)
-        if not should_ignore_finales:
-            is_episode_finale = season_num in season_finales and episode_num == season_finales[season_num]
+        if not has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping):
+            is_episode_finale = episode_num == timeline['seasons'][season_num]['max_episode']
             if is_episode_finale:
-                continue
+                return matched_shows, skipped_shows
         
         tvdb_id = series.get('tvdbId')
         air_date_str_yyyy_mm_dd = air_date.date().isoformat()
@@ -187,76 +127,42 @@ def find_upcoming_regular_episodes(sonarr_url, api_key, all_series, future_days_
             
             if not episode_monitored or not season_monitored:
                 skipped_shows.append(show_dict)
-                continue
+                return matched_shows, skipped_shows
         
         matched_shows.append(show_dict)
+        
+        return matched_shows, skipped_shows
     
-    return matched_shows, skipped_shows
+    return classify
 
 
-def find_upcoming_finales(sonarr_url, api_key, all_series, future_days_upcoming_finale, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
-    """Find shows with upcoming season finales within the specified days"""
+def upcoming_finale_classifier(future_days_upcoming_finale, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Create a per-series classifier for shows with upcoming season finales within the specified days"""
     cutoff_date = datetime.now(timezone.utc) + timedelta(days=future_days_upcoming_finale)
-    matched_shows = []
-    skipped_shows = []
     
-    for series in all_series:
+    def classify(series, timeline):
+        matched_shows = []
+        skipped_shows = []
+        
         # Skip shows with ignore finale tags
         if has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping):
-            continue
-            
-        episodes = get_sonarr_episodes(sonarr_url, api_key, series['id'])
-        
-        # Group episodes by season
-        seasons = defaultdict(list)
-        for ep in episodes:
-            if ep.get('seasonNumber') > 0:  # Skip specials
-                seasons[ep.get('seasonNumber')].append(ep)
-        
-        # For each season, find the max episode number to identify finales
-        season_finales = {}
-        for season_num, season_eps in seasons.items():
-            if season_eps:
-                max_ep = max(ep.get('episodeNumber', 0) for ep in season_eps)
-                # Only consider it a finale if it's not episode 1
-                if max_ep > 1:
-                    season_finales[season_num] = max_ep
-        
-        future_episodes = []
-        for ep in episodes:
-            # Skip specials (season 0)
-            season_number = ep.get('seasonNumber', 0)
-            if season_number == 0:
-                continue
-                
-            air_date_str = ep.get('airDateUtc')
-            if not air_date_str:
-                continue
-            
-            air_date = convert_utc_to_local(air_date_str, utc_offset)
-            
-            now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
-            
-            # Skip episodes that have already been downloaded - they'll be handled by recent_season_finales
-            if ep.get('hasFile', False):
-                continue
-                
-            if air_date > now_local and air_date <= cutoff_date:
-                future_episodes.append((ep, air_date))
+            return matched_shows, skipped_shows
         
-        future_episodes.sort(key=lambda x: x[1])
+        # Downloaded episodes are never the next future episode - they'll be handled by recent_season_finales
+        if not timeline['next_future']:
+            return matched_shows, skipped_shows
         
-        if not future_episodes:
-            continue
+        next_future, air_date = timeline['next_future']
+        if air_date > cutoff_date:
+            return matched_shows, skipped_shows
         
-        next_future, air_date = future_episodes[0]
         season_num = next_future.get('seasonNumber')
         episode_num = next_future.get('episodeNumber')
         
         # Only include season finales and ensure episode number is greater than 1
-        is_episode_finale = season_num in season_finales and episode_num == season_finales[season_num] and episode_num > 1
+        is_episode_finale = episode_num == timeline['seasons'][season_num]['max_episode'] and episode_num > 1
         if not is_episode_finale:
-            continue
+            return matched_shows, skipped_shows
         
         tvdb_id = series.get('tvdbId')
         air_date_str_yyyy_mm_dd = air_date.date().isoformat()
@@ -280,69 +186,38 @@ def find_upcoming_finales(sonarr_url, api_key, all_series, future_days_upcoming_
             
             if not episode_monitored or not season_monitored:
                 skipped_shows.append(show_dict)
-                continue
+                return matched_shows, skipped_shows
         
         matched_shows.append(show_dict)
+        
+        return matched_shows, skipped_shows
     
-    return matched_shows, skipped_shows
+    return classify
 
 
-def find_recent_season_finales(sonarr_url, api_key, all_series, recent_days_season_finale, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
-    """Find shows with status 'continuing' that had a season finale air within the specified days or have a future finale that's already downloaded"""
+def season_finale_classifier(recent_days_season_finale, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Create a per-series classifier for continuing shows with a recently aired or already downloaded season finale"""
     now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
     cutoff_date = now_local - timedelta(days=recent_days_season_finale)
-    matched_shows = []
     
-    for series in all_series:
+    def classify(series, timeline):
+        matched_shows = []
+        skipped_shows = []
+        
         # Only include continuing shows
         if series.get('status') not in ['continuing', 'upcoming']:
-            continue
+            return matched_shows, skipped_shows
             
         # Skip shows with ignore finale tags
         if has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping):
-            continue
+            return matched_shows, skipped_shows
         
         # Skip unmonitored shows if requested
         if skip_unmonitored and not series.get('monitored', True):
-            continue
+            return matched_shows, skipped_shows
             
-        episodes = get_sonarr_episodes(sonarr_url, api_key, series['id'])
-        
-        # Group episodes by season and find downloaded episodes
-        seasons = defaultdict(list)
-        downloaded_episodes = defaultdict(list)
-        
-        for ep in episodes:
-            season_number = ep.get('seasonNumber', 0)
-            if season_number > 0:  # Skip specials
-                seasons[season_number].append(ep)
-                if ep.get('hasFile', False):
-                    downloaded_episodes[season_number].append(ep)
-        
-        # For each season, find the max episode number to identify finales
-        season_finales = {}
-        for season_num, season_eps in seasons.items():
-            # Only consider it a finale if there are multiple episodes in the season
-            if len(season_eps) > 1:
-                max_ep = max(ep.get('episodeNumber', 0) for ep in season_eps)
-                season_finales[season_num] = max_ep
-        
-        # Look for recently aired season finales
-        for season_num, max_episode_num in season_finales.items():
-            # Skip if no episodes downloaded for this season
-            if season_num not in downloaded_episodes:
-                continue
-                
-            # Find the finale episode
-            finale_episode = None
-            for ep in downloaded_episodes[season_num]:
-                if ep.get('episodeNumber') == max_episode_num:
-                    finale_episode = ep
-                    break
-            
-            if not finale_episode:
-                continue
-                
+        # Look for recently aired season finales among the downloaded ones
+        for season_num, max_episode_num, finale_episode, air_date in timeline['season_finales']:
             # Skip if the season is unmonitored and skip_unmonitored is True
             if skip_unmonitored:
                 season_monitored = True
@@ -358,11 +233,8 @@ def find_recent_season_finales(sonarr_url, api_key, all_series, recent_days_seas
                 if not finale_episode.get("monitored", True):
                     continue
             
-            air_date_str = finale_episode.get('airDateUtc')
-            if not air_date_str:
+            if air_date is None:
                 continue
-                
-            air_date = convert_utc_to_local(air_date_str, utc_offset)
             
             # Include if:
             # 1. It aired within the recent period, OR
@@ -385,65 +257,40 @@ def find_recent_season_finales(sonarr_url, api_key, all_series, recent_days_seas
                 }
                 
                 matched_shows.append(show_dict)
+        
+        return matched_shows, skipped_shows
     
-    return matched_shows
+    return classify
 
 
-def find_recent_final_episodes(sonarr_url, api_key, all_series, recent_days_final_episode, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
-    """Find shows with status 'ended' that had their final episode air within the specified days or have a future final episode that's already downloaded"""
+def final_episode_classifier(recent_days_final_episode, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Create a per-series classifier for ended shows with a recently aired or already downloaded final episode"""
     now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
     cutoff_date = now_local - timedelta(days=recent_days_final_episode)
-    matched_shows = []
-  
-    for series in all_series:
+    
+    def classify(series, timeline):
+        matched_shows = []
+        skipped_shows = []
+        
         # Only include ended shows
         if series.get('status') != 'ended':
-            continue
+            return matched_shows, skipped_shows
             
         # Skip shows with ignore finale tags
         if has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping):
-            continue
+            return matched_shows, skipped_shows
             
         # Skip unmonitored shows if requested
         if skip_unmonitored and not series.get('monitored', True):
-            continue
-            
-        episodes = get_sonarr_episodes(sonarr_url, api_key, series['id'])
-        
-        # Group episodes by season and find downloaded episodes
-        seasons = defaultdict(list)
-        downloaded_episodes = defaultdict(list)
-        
-        for ep in episodes:
-            season_number = ep.get('seasonNumber', 0)
-            if season_number > 0:  # Skip specials
-                seasons[season_number].append(ep)
-                if ep.get('hasFile', False):
-                    downloaded_episodes[season_number].append(ep)
-        
-        # Skip if no episodes downloaded
-        if not any(downloaded_episodes.values()):
-            continue
+            return matched_shows, skipped_shows
             
-        # Find the highest season with downloaded episodes
-        max_season = max(downloaded_episodes.keys()) if downloaded_episodes else 0
+        # The final episode is the highest downloaded episode of the highest season with downloads
+        if not timeline['last_downloaded']:
+            return matched_shows, skipped_shows
         
-        # Skip if no valid seasons found
-        if max_season == 0:
-            continue
-            
-        # Find the highest episode number in the highest season
-        max_episode_num = max(ep.get('episodeNumber', 0) for ep in downloaded_episodes[max_season])
-        
-        # Find the final episode
-        final_episode = None
-        for ep in downloaded_episodes[max_season]:
-            if ep.get('episodeNumber') == max_episode_num:
-                final_episode = ep
-                break
-        
-        if not final_episode:
-            continue
+        max_season = timeline['latest_season']
+        final_episode, air_date = timeline['last_downloaded']
+        max_episode_num = final_episode.get('episodeNumber')
             
         # Skip if the season is unmonitored and skip_unmonitored is True
         if skip_unmonitored:
@@ -454,36 +301,18 @@ def find_recent_final_episodes(sonarr_url, api_key, all_series, recent_days_fina
                     break
             
             if not season_monitored:
-                continue
+                return matched_shows, skipped_shows
             
             # Also check if the episode itself is monitored
             if not final_episode.get("monitored", True):
-                continue
+                return matched_shows, skipped_shows
         
-        # Check if there are any future episodes that aren't downloaded
-        has_future_undownloaded_episodes = False
-        for ep in episodes:
-            air_date_str = ep.get('airDateUtc')
-            season_number = ep.get('seasonNumber', 0)
-            has_file = ep.get('hasFile', False)
+        # Skip if there are any future episodes that aren't downloaded
+        if timeline['next_future']:
+            return matched_shows, skipped_shows
             
-            if season_number == 0:  # Skip specials
-                continue
-                
-            if air_date_str:
-                air_date = convert_utc_to_local(air_date_str, utc_offset)
-                if air_date > now_local and not has_file:
-                    has_future_undownloaded_episodes = True
-                    break
-        
-        if has_future_undownloaded_episodes:
-            continue
-            
-        air_date_str = final_episode.get('airDateUtc')
-        if not air_date_str:
-            continue
-            
-        air_date = convert_utc_to_local(air_date_str, utc_offset)
+        if air_date is None:
+            return matched_shows, skipped_shows
         
         # Include if:
         # 1. It aired within the recent period, OR
@@ -506,56 +335,49 @@ def find_recent_final_episodes(sonarr_url, api_key, all_series, recent_days_fina
             }
             
             matched_shows.append(show_dict)
+        
+        return matched_shows, skipped_shows
     
-    return matched_shows
+    return classify
 
 
-def find_new_season_started(sonarr_url, api_key, all_series, recent_days_new_season_started, utc_offset=0, skip_unmonitored=False):
-    """Find shows where a new season (not season 1) has been downloaded within the specified days"""
+def new_season_started_classifier(recent_days_new_season_started, utc_offset=0, skip_unmonitored=False):
+    """Create a per-series classifier for shows where a new season (not season 1) has been downloaded within the specified days"""
     now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
     cutoff_date = now_local - timedelta(days=recent_days_new_season_started)
-    matched_shows = []
-   
-    for series in all_series:
+    
+    def classify(series, timeline):
+        matched_shows = []
+        skipped_shows = []
+        
         # Skip unmonitored shows if requested
         if skip_unmonitored and not series.get('monitored', True):
-            continue
+            return matched_shows, skipped_shows
             
-        episodes = get_sonarr_episodes(sonarr_url, api_key, series['id'])
-        
-        # Group episodes by season and find downloaded episodes
-        seasons = defaultdict(list)
-        downloaded_episodes = defaultdict(list)
-        
-        for ep in episodes:
-            season_number = ep.get('seasonNumber', 0)
-            if season_number > 0:  # Skip specials
-                seasons[season_number].append(ep)
-                if ep.get('hasFile', False):
-                    downloaded_episodes[season_number].append(ep)
+        seasons = timeline['seasons']
         
         # Skip if there's only one season (new show)
         if len(seasons) <= 1:
-            continue
+            return matched_shows, skipped_shows
             
         # Find the highest season number with downloaded episodes
-        if not downloaded_episodes:
-            continue
-            
-        max_season_with_downloads = max(downloaded_episodes.keys())
+        max_season_with_downloads = timeline['latest_season']
+        if max_season_with_downloads is None:
+            return matched_shows, skipped_shows
         
         # Skip if it's season 1 (new show)
         if max_season_with_downloads <= 1:
-            continue
+            return matched_shows, skipped_shows
             
         # Check if there are previous seasons with downloads (to confirm it's not a new show)
-        has_previous_season_downloads = any(season < max_season_with_downloads for season in downloaded_episodes.keys())
+        has_previous_season_downloads = any(
+            season_num < max_season_with_downloads and season['downloaded_count'] for season_num, season in seasons.items()
+        )
         if not has_previous_season_downloads:
-            continue
+            return matched_shows, skipped_shows
         
-        # Find the first episode of the highest season that was downloaded
-        season_episodes = downloaded_episodes[max_season_with_downloads]
-        first_episode = min(season_episodes, key=lambda ep: ep.get('episodeNumber', 999))
+        # The first episode of the highest season that was downloaded
+        first_episode, air_date = timeline['first_of_latest_season']
         
         # Skip if the season is unmonitored and skip_unmonitored is True
         if skip_unmonitored:
@@ -566,18 +388,15 @@ def find_new_season_started(sonarr_url, api_key, all_series, recent_days_new_sea
                     break
             
             if not season_monitored:
-                continue
+                return matched_shows, skipped_shows
             
             # Also check if the episode itself is monitored
             if not first_episode.get("monitored", True):
-                continue
+                return matched_shows, skipped_shows
         
         # Check when this episode was downloaded (use air date as proxy)
-        air_date_str = first_episode.get('airDateUtc')
-        if not air_date_str:
-            continue
-            
-        air_date = convert_utc_to_local(air_date_str, utc_offset)
+        if air_date is None:
+            return matched_shows, skipped_shows
         
         # Include if it aired within the recent period (assuming download happened around air date)
         if air_date >= cutoff_date and air_date <= now_local:
@@ -593,5 +412,98 @@ def find_new_season_started(sonarr_url, api_key, all_series, recent_days_new_sea
             }
             
             matched_shows.append(show_dict)
+        
+        return matched_shows, skipped_shows
     
-    return matched_shows
\ No newline at end of file
+    return classify
+
+
+def iter_classified_series(series_stream, classifiers, utc_offset=0, use_numpy=False):
+    """Classify series episode payloads as they arrive.
+
+    series_stream yields (index, series, episodes) tuples in any order. Each payload is turned into
+    a timeline once, every classifier decides its category from that timeline, and the payload is
+    dropped afterwards. Yields (index, series, timeline, results) with results mapping each category
+    to its (matched_shows, skipped_shows); timeline is None for series whose episodes couldn't be
+    fetched. use_numpy builds the timelines in batches with the NumPy engine.
+    """
+    now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
+    
+    for index, series, timeline in iter_series_timelines(series_stream, now_local, utc_offset, use_numpy):
+        if timeline is None:
+            results = {category: ([], []) for category in classifiers}
+        else:
+            results = {category: classifier(series, timeline) for category, classifier in classifiers.items()}
+        yield index, series, timeline, results
+
+
+def collect_category_results(classified_series, categories):
+    """Collect the matched/skipped shows per category, in index order so the output matches a sequential run"""
+    results = {category: ([], []) for category in categories}
+    
+    for index, _, _, series_results in classified_series:
+        for category, (matched_shows, skipped_shows) in series_results.items():
+            results[category][0].extend((index, show) for show in matched_shows)
+            results[category][1].extend((index, show) for show in skipped_shows)
+    
+    ordered_results = {}
+    for category, (matched_shows, skipped_shows) in results.items():
+        ordered_results[category] = (
+            [show for _, show in sorted(matched_shows, key=lambda x: x[0])],
+            [show for _, show in sorted(skipped_shows, key=lambda x: x[0])]
+        )
+    return ordered_results
+
+
+def classify_series_stream(series_stream, classifiers, utc_offset=0, use_numpy=False):
+    """Classify series episode payloads as they arrive and return matched/skipped shows per category.
+
+    Only the matched shows stay in memory, see iter_classified_series.
+    """
+    classified_series = iter_classified_series(series_stream, classifiers, utc_offset, use_numpy)
+    return collect_category_results(classified_series, classifiers)
+
+
+def classify_all_series(classifier, episodes_by_series, all_series, utc_offset=0):
+    """Run a single per-series classifier over all series with already fetched episodes"""
+    series_stream = (
+        (index, series, episodes_by_series.get(series['id'], []))
+        for index, series in enumerate(all_series)
+    )
+    return classify_series_stream(series_stream, {'shows': classifier}, utc_offset)['shows']
+
+
+def find_new_season_shows(episodes_by_series, all_series, tag_mapping, future_days_new_season, utc_offset=0, skip_unmonitored=False):
+    """Find shows with a new season starting within the specified days"""
+    classifier = new_season_soon_classifier(tag_mapping, future_days_new_season, utc_offset, skip_unmonitored)
+    return classify_all_series(classifier, episodes_by_series, all_series, utc_offset)
+
+
+def find_upcoming_regular_episodes(episodes_by_series, all_series, future_days_upcoming_episode, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Find shows with upcoming non-premiere, non-finale episodes within the specified days"""
+    classifier = upcoming_episode_classifier(future_days_upcoming_episode, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping)
+    return classify_all_series(classifier, episodes_by_series, all_series, utc_offset)
+
+
+def find_upcoming_finales(episodes_by_series, all_series, future_days_upcoming_finale, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Find shows with upcoming season finales within the specified days"""
+    classifier = upcoming_finale_classifier(future_days_upcoming_finale, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping)
+    return classify_all_series(classifier, episodes_by_series, all_series, utc_offset)
+
+
+def find_recent_season_finales(episodes_by_series, all_series, recent_days_season_finale, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Find shows with status 'continuing' that had a season finale air within the specified days or have a future finale that's already downloaded"""
+    classifier = season_finale_classifier(recent_days_season_finale, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping)
+    return classify_all_series(classifier, episodes_by_series, all_series, utc_offset)[0]
+
+
+def find_recent_final_episodes(episodes_by_series, all_series, recent_days_final_episode, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Find shows with status 'ended' that had their final episode air within the specified days or have a future final episode that's already downloaded"""
+    classifier = final_episode_classifier(recent_days_final_episode, utc_offset, skip_unmonitored, ignore_finales_tags, tag_mapping)
+    return classify_all_series(classifier, episodes_by_series, all_series, utc_offset)[0]
+
+
+def find_new_season_started(episodes_by_series, all_series, recent_days_new_season_started, utc_offset=0, skip_unmonitored=False):
+    """Find shows where a new season (not season 1) has been downloaded within the specified days"""
+    classifier = new_season_started_classifier(recent_days_new_season_started, utc_offset, skip_unmonitored)
+    return classify_all_series(classifier, episodes_by_series, all_series, utc_offset)[0]
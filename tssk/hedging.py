@@ -0,0 +1,136 @@
+"""Hedged requests for TSSK - duplicates the slowest requests of a run and uses whichever answers first"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+DEFAULT_HEDGE_PERCENTILE = 95
+DEFAULT_HEDGE_BUDGET = 0.05
+
+# Requests that need to have completed before their latency percentile is trusted
+MIN_SAMPLES = 20
+
+
+def new_hedger(max_in_flight, percentile=DEFAULT_HEDGE_PERCENTILE, budget=DEFAULT_HEDGE_BUDGET):
+    """Create the state for hedging up to max_in_flight requests at a time.
+
+    A request still running after the given percentile of the latencies measured so far in the run
+    gets a duplicate, as long as no more than budget (a fraction) of all requests have been hedged.
+    """
+    lock = threading.Lock()
+    return {
+        'percentile': min(max(float(percentile), 0.0), 100.0),
+        'budget': max(0.0, float(budget)),
+        'latencies': [],
+        'threshold': None,
+        'requests': 0,
+        'hedges': 0,
+        'hedge_wins': 0,
+        # Calls of function still running, and hedged_calls that haven't returned yet
+        'calls_running': 0,
+        'calls_active': 0,
+        'lock': lock,
+        'call_finished': threading.Condition(lock),
+        # Room for a duplicate next to every request in flight
+        'executor': ThreadPoolExecutor(max_workers=max(1, int(max_in_flight)) * 2)
+    }
+
+
+def _record_latency(hedger, latency):
+    with hedger['lock']:
+        hedger['latencies'].append(latency)
+        count = len(hedger['latencies'])
+        # The percentile moves slowly, no need to sort after every request
+        if count >= MIN_SAMPLES and (hedger['threshold'] is None or count % MIN_SAMPLES == 0):
+            ordered = sorted(hedger['latencies'])
+            hedger['threshold'] = ordered[int(hedger['percentile'] / 100 * (count - 1))]
+
+
+def _take_hedge(hedger):
+    with hedger['lock']:
+        if hedger['hedges'] + 1 > hedger['requests'] * hedger['budget']:
+            return False
+        hedger['hedges'] += 1
+        return True
+
+
+def _finish_call(hedger, future):
+    with hedger['call_finished']:
+        hedger['calls_running'] -= 1
+        hedger['call_finished'].notify_all()
+
+
+def _submit_call(hedger, function, args):
+    with hedger['lock']:
+        hedger['calls_running'] += 1
+    future = hedger['executor'].submit(function, *args)
+    future.add_done_callback(lambda finished: _finish_call(hedger, finished))
+    return future
+
+
+def hedged_call(hedger, function, *args):
+    """Call function(*args), sending a duplicate call if it's slow, and return the first usable result.
+
+    function must return None when it fails, in which case the other call's result is waited for.
+    """
+    with hedger['lock']:
+        hedger['requests'] += 1
+        hedger['calls_active'] += 1
+        threshold = hedger['threshold']
+
+    try:
+        start = time.monotonic()
+        primary = _submit_call(hedger, function, args)
+        pending = {primary}
+        if threshold is not None:
+            done, _ = wait(pending, timeout=threshold)
+            if not done and _take_hedge(hedger):
+                pending.add(_submit_call(hedger, function, args))
+
+        result = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                if result is None:
+                    continue
+                _record_latency(hedger, time.monotonic() - start)
+                if future is not primary:
+                    with hedger['lock']:
+                        hedger['hedge_wins'] += 1
+                # The slower call finishes in the background (see count_extra_requests) and its result is dropped
+                return result
+        return result
+    finally:
+        with hedger['lock']:
+            hedger['calls_active'] -= 1
+
+
+def count_extra_requests(hedger):
+    """Get the number of duplicate requests in flight: duplicates of running hedged_calls and the
+    slower calls still finishing after their hedged_call returned.
+
+    Callers limiting their requests in flight count these against the limit too.
+    """
+    with hedger['lock']:
+        return max(0, hedger['calls_running'] - hedger['calls_active'])
+
+
+def wait_for_extra_requests(hedger, allowed):
+    """Wait until no more than allowed duplicate requests are in flight"""
+    with hedger['call_finished']:
+        hedger['call_finished'].wait_for(lambda: hedger['calls_running'] - hedger['calls_active'] <= allowed)
+
+
+def close_hedger(hedger):
+    """Release the hedger's threads once the calls still running finish"""
+    hedger['executor'].shutdown(wait=False)
+
+
+def format_hedging_summary(hedger):
+    """Describe how many requests were hedged, for the run summary"""
+    return (
+        f"{hedger['hedges']} of {hedger['requests']} requests hedged, "
+        f"{hedger['hedge_wins']} answered first by the duplicate"
+    )
@@ -0,0 +1,367 @@
+"""Shared HTTP client for TSSK - pooled keep-alive sessions with retry/backoff, circuit breakers and a run deadline"""
+
+import codecs
+import json
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .constants import GREEN, ORANGE, RESET, DEFAULT_SCAN_CONCURRENCY, DEFAULT_WRITE_CONCURRENCY
+from .concurrency import DEFAULT_MAX_CONCURRENCY
+
+
+# Status codes that are retried with backoff (rate limiting and transient server errors)
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+
+# Consecutive failed requests (after retries) to a host before its remaining requests fail fast
+DEFAULT_CIRCUIT_BREAKER_THRESHOLD = 5
+# How long a tripped host is left alone before one request is let through to test it
+DEFAULT_CIRCUIT_BREAKER_COOLDOWN_SECONDS = 60
+
+# Errors that say a host is down or overloaded, as opposed to a request it rejected
+FAILURE_EXCEPTIONS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError
+)
+
+# Size of the chunks read from streamed JSON responses
+JSON_CHUNK_SIZE = 64 * 1024
+JSON_DELIMITERS = (' ', '\t', '\r', '\n', ',', ']')
+
+_settings = {
+    'pool_size': DEFAULT_POOL_SIZE,
+    'retries': DEFAULT_RETRIES,
+    'backoff_factor': DEFAULT_BACKOFF_FACTOR
+}
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Per-run state: circuit breaker of every host and the run deadline (a time.monotonic() value)
+_run = {
+    'circuit_breaker_threshold': DEFAULT_CIRCUIT_BREAKER_THRESHOLD,
+    'circuit_breaker_cooldown': DEFAULT_CIRCUIT_BREAKER_COOLDOWN_SECONDS,
+    'timeout_minutes': 0,
+    'deadline': None,
+    'deadline_reported': False,
+    'circuits': {}
+}
+_run_lock = threading.Lock()
+
+
+class RequestRejected(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request whose host's circuit breaker is open or once the run deadline passed"""
+
+
+def _get_max_sonarr_connections(config):
+    """Get the most requests a run can have in flight to one Sonarr instance"""
+    concurrency = int(config.get('sonarr_concurrency', 1))
+    if str(config.get('sonarr_adaptive_concurrency', 'false')).lower() == 'true':
+        concurrency = max(concurrency, int(config.get('sonarr_max_concurrency', DEFAULT_MAX_CONCURRENCY)))
+    # A hedged request can have its duplicate in flight next to it
+    if str(config.get('sonarr_hedge_requests', 'false')).lower() == 'true':
+        concurrency *= 2
+    return concurrency
+
+
+def configure_http_client(config):
+    """Apply pool size and retry settings from the config, replacing existing sessions only if they changed"""
+    settings = {
+        # Never let parallel Sonarr fetches or Plex scans and writes queue up behind a smaller connection pool
+        'pool_size': max(1, int(config.get('http_pool_size', DEFAULT_POOL_SIZE)),
+                         _get_max_sonarr_connections(config),
+                         int(config.get('plex_write_concurrency', DEFAULT_WRITE_CONCURRENCY)),
+                         int(config.get('plex_scan_concurrency', DEFAULT_SCAN_CONCURRENCY))),
+        'retries': max(0, int(config.get('http_retries', DEFAULT_RETRIES))),
+        'backoff_factor': max(0.0, float(config.get('http_backoff_factor', DEFAULT_BACKOFF_FACTOR)))
+    }
+    # Keep the warm connections of earlier runs in daemon mode
+    if settings != _settings:
+        _settings.update(settings)
+        close_sessions()
+
+    # Every run starts with closed circuits and its own deadline
+    timeout_minutes = max(0.0, float(config.get('run_timeout_minutes', 0)))
+    with _run_lock:
+        _run.update({
+            'circuit_breaker_threshold': max(0, int(config.get('circuit_breaker_threshold', DEFAULT_CIRCUIT_BREAKER_THRESHOLD))),
+            'circuit_breaker_cooldown': max(0.0, float(config.get('circuit_breaker_cooldown_seconds',
+                                                                  DEFAULT_CIRCUIT_BREAKER_COOLDOWN_SECONDS))),
+            'timeout_minutes': timeout_minutes,
+            'deadline': time.monotonic() + timeout_minutes * 60 if timeout_minutes else None,
+            'deadline_reported': False,
+            'circuits': {}
+        })
+
+
+def _create_retry(retries):
+    """Create the urllib3 retry policy: connection errors and 429/5xx responses, never read timeouts"""
+    retry_kwargs = {
+        'total': retries,
+        'connect': retries,
+        'read': 0,
+        'status': retries,
+        'backoff_factor': _settings['backoff_factor'],
+        'status_forcelist': RETRY_STATUS_CODES,
+        'allowed_methods': frozenset(['GET', 'PUT']),
+        'respect_retry_after_header': True,
+        'raise_on_status': False
+    }
+    try:
+        # Jitter spreads out retries of parallel requests (urllib3 >= 2)
+        return Retry(backoff_jitter=_settings['backoff_factor'], **retry_kwargs)
+    except TypeError:
+        return Retry(**retry_kwargs)
+
+
+def _get_host(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _get_circuit(host):
+    # Callers hold _run_lock
+    circuit = _run['circuits'].get(host)
+    if circuit is None:
+        circuit = {'failures': 0, 'opened_at': None, 'probing': False, 'rejected': 0}
+        _run['circuits'][host] = circuit
+    return circuit
+
+
+def _admit_request(url, kwargs):
+    """Raise RequestRejected if the request may not be sent, otherwise cap its timeout to the run deadline"""
+    host = _get_host(url)
+    with _run_lock:
+        circuit = _get_circuit(host)
+        if _run['deadline'] is not None:
+            remaining = _run['deadline'] - time.monotonic()
+            if remaining <= 0:
+                circuit['rejected'] += 1
+                if not _run['deadline_reported']:
+                    _run['deadline_reported'] = True
+                    print(f"{ORANGE}Warning: Run deadline of {_run['timeout_minutes']:g} minutes reached, "
+                          f"failing the remaining requests{RESET}")
+                raise RequestRejected(f"Run deadline of {_run['timeout_minutes']:g} minutes reached")
+            timeout = kwargs.get('timeout')
+            if isinstance(timeout, tuple):
+                # (connect, read) timeouts
+                kwargs['timeout'] = tuple(remaining if part is None else min(part, remaining) for part in timeout)
+            elif timeout is None or timeout > remaining:
+                kwargs['timeout'] = remaining
+
+        if circuit['opened_at'] is not None:
+            # After the cooldown one request at a time tests whether the host is back
+            if circuit['probing'] or time.monotonic() - circuit['opened_at'] < _run['circuit_breaker_cooldown']:
+                circuit['rejected'] += 1
+                raise RequestRejected(f"Circuit breaker for {host} is open after {circuit['failures']} failed requests")
+            circuit['probing'] = True
+
+
+def _record_result(url, failed):
+    """Update the circuit breaker of the URL's host with the outcome of a request"""
+    host = _get_host(url)
+    with _run_lock:
+        circuit = _get_circuit(host)
+        was_open = circuit['opened_at'] is not None
+        circuit['probing'] = False
+        if not failed:
+            circuit['failures'] = 0
+            circuit['opened_at'] = None
+            if was_open:
+                print(f"{GREEN}{host} is responding again, circuit breaker closed{RESET}")
+            return
+
+        circuit['failures'] += 1
+        threshold = _run['circuit_breaker_threshold']
+        if was_open or (threshold and circuit['failures'] >= threshold):
+            circuit['opened_at'] = time.monotonic()
+            if not was_open:
+                print(f"{ORANGE}Warning: {circuit['failures']} requests to {host} failed in a row, "
+                      f"failing its remaining requests fast{RESET}")
+
+
+def get_rejected_requests(url):
+    """Get how many requests to the URL's host were rejected this run (open circuit breaker or run deadline)"""
+    with _run_lock:
+        circuit = _run['circuits'].get(_get_host(url))
+        return circuit['rejected'] if circuit else 0
+
+
+def _send(method, url, retries=None, record=True, **kwargs):
+    """Send a request through the pooled session for the URL's host, guarded by its circuit breaker.
+
+    With record=False the caller reports the outcome with _record_result (e.g. after reading a streamed body).
+    """
+    _admit_request(url, kwargs)
+    try:
+        response = get_session(url, retries).request(method, url, **kwargs)
+    except FAILURE_EXCEPTIONS:
+        _record_result(url, True)
+        raise
+    except requests.exceptions.RequestException:
+        _record_result(url, False)
+        raise
+    # An error response has no body worth waiting for, so it settles the outcome right away
+    if record or response.status_code >= 400:
+        _record_result(url, response.status_code >= 500)
+    return response
+
+
+def get_session(url, retries=None):
+    """Get the pooled keep-alive session for the host of the given URL"""
+    if retries is None:
+        retries = _settings['retries']
+    host_key = (_get_host(url), retries)
+
+    with _sessions_lock:
+        session = _sessions.get(host_key)
+        if session is None:
+            adapter = HTTPAdapter(
+                pool_connections=1,
+                pool_maxsize=_settings['pool_size'],
+                max_retries=_create_retry(retries)
+            )
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _sessions[host_key] = session
+        return session
+
+
+def http_get(url, retries=None, **kwargs):
+    """Send a GET request through the pooled session for the URL's host"""
+    return _send('GET', url, retries, **kwargs)
+
+
+def http_put(url, retries=None, **kwargs):
+    """Send a PUT request through the pooled session for the URL's host"""
+    return _send('PUT', url, retries, **kwargs)
+
+
+def project_fields(value, fields):
+    """Keep only the given fields of a decoded JSON object, or of every object in a list.
+
+    fields is a tuple of field names; a (name, sub_fields) pair projects a nested object or list.
+    """
+    if isinstance(value, list):
+        return [project_fields(item, fields) for item in value]
+    if not isinstance(value, dict):
+        return value
+
+    projected = {}
+    for field in fields:
+        if isinstance(field, tuple):
+            name, sub_fields = field
+            if name in value:
+                projected[name] = project_fields(value[name], sub_fields)
+        elif field in value:
+            projected[field] = value[field]
+    return projected
+
+
+def iter_json_array(response, array_key=None):
+    """Incrementally decode the items of a JSON array from a streamed response.
+
+    Without array_key the response body itself is the array, otherwise the array is the value of
+    the first "array_key" found (e.g. Plex's MediaContainer.Metadata). Only the item being decoded
+    and the current chunk are held in memory. Yields nothing if array_key is not in the response.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder(response.encoding or 'utf-8')()
+    chunks = response.iter_content(chunk_size=JSON_CHUNK_SIZE)
+    if array_key is None:
+        array_start = re.compile(r'\[')
+    else:
+        array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(array_key))
+
+    def read_chunk():
+        chunk = next(chunks, None)
+        if chunk is None:
+            return text_decoder.decode(b'', final=True), False
+        return text_decoder.decode(chunk), True
+
+    # Find where the array starts
+    buffer = ''
+    more = True
+    while True:
+        match = array_start.search(buffer)
+        if match:
+            buffer = buffer[match.end():]
+            break
+        if not more:
+            return
+        # Keep enough of the tail to find a key split over two chunks
+        buffer = buffer[-(len(array_key or '') + 256):]
+        text, more = read_chunk()
+        buffer += text
+
+    # Decode one array item at a time
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in JSON_DELIMITERS[:-1]:
+            position += 1
+
+        if position < len(buffer) and buffer[position] == ']':
+            # Read the rest of the body so the connection can be reused
+            for _ in chunks:
+                pass
+            return
+
+        item = None
+        end = None
+        if position < len(buffer):
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                end = None
+            # A number or literal is only complete once its delimiter is in the buffer
+            if end is not None and not isinstance(item, (dict, list, str)) and buffer[end:end + 1] not in JSON_DELIMITERS:
+                end = None
+
+        if end is None:
+            if not more:
+                raise requests.exceptions.InvalidJSONError(f"Invalid or truncated JSON array in response from {response.url}")
+            buffer = buffer[position:]
+            position = 0
+            text, more = read_chunk()
+            buffer += text
+            continue
+
+        yield item
+        position = end
+
+
+def http_get_json_items(url, fields=None, array_key=None, **kwargs):
+    """GET a JSON array and decode it incrementally, keeping only the given fields of each item"""
+    with _send('GET', url, record=False, stream=True, **kwargs) as response:
+        response.raise_for_status()
+        try:
+            if fields is None:
+                items = list(iter_json_array(response, array_key))
+            else:
+                items = [project_fields(item, fields) for item in iter_json_array(response, array_key)]
+        except FAILURE_EXCEPTIONS:
+            _record_result(url, True)
+            raise
+        except Exception:
+            _record_result(url, False)
+            raise
+        _record_result(url, False)
+        return items
+
+
+def close_sessions():
+    """Close all pooled sessions and their connections"""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
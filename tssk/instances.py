@@ -0,0 +1,81 @@
+"""Multiple Sonarr instances for TSSK - merges the series and results of all instances into one set"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+
+def get_sonarr_instances(config):
+    """Get the Sonarr instances to read from, in order of precedence.
+
+    Uses the sonarr_instances list when present (each with a url, api_key and optional name),
+    otherwise the single sonarr_url/sonarr_api_key instance.
+    """
+    instances = config.get('sonarr_instances')
+    if not instances:
+        return [{'name': 'Sonarr', 'url': config['sonarr_url'], 'api_key': config['sonarr_api_key']}]
+
+    return [
+        {
+            'name': str(instance.get('name') or f"Sonarr {number}"),
+            'url': instance['url'],
+            'api_key': instance['api_key']
+        }
+        for number, instance in enumerate(instances, 1)
+    ]
+
+
+def map_instances(function, items):
+    """Call function for every item (one per instance) at the same time, returning the results in order"""
+    items = list(items)
+    if len(items) <= 1:
+        return [function(item) for item in items]
+    with ThreadPoolExecutor(max_workers=len(items)) as executor:
+        return list(executor.map(function, items))
+
+
+def _get_show_key(show, instance_number):
+    # Series without a tvdbId can't be matched across instances
+    tvdb_id = show.get('tvdbId')
+    return ('tvdb', tvdb_id) if tvdb_id else ('instance', instance_number, show.get('id', show.get('title')))
+
+
+def _merge_shows(show_lists, excluded_keys=frozenset()):
+    """Concatenate the shows of all instances, leaving out shows already listed by an earlier instance.
+
+    A series can appear more than once in one instance's list (e.g. two finales), those entries are all kept.
+    """
+    merged = []
+    merged_keys = set()
+    for instance_number, shows in enumerate(show_lists):
+        instance_keys = set()
+        for show in shows:
+            key = _get_show_key(show, instance_number)
+            if key not in merged_keys and key not in excluded_keys:
+                instance_keys.add(key)
+                merged.append(show)
+        merged_keys |= instance_keys
+    return merged, merged_keys
+
+
+def merge_series(series_lists):
+    """Merge the series of all instances, keeping the first instance's copy of a series found in several"""
+    if len(series_lists) == 1:
+        return series_lists[0]
+    return _merge_shows(series_lists)[0]
+
+
+def merge_category_results(results_per_instance):
+    """Merge the (matched, skipped) shows of every category over all instances.
+
+    A show matches a category if it matches in any instance; the entries of the first instance
+    (in sonarr_instances order) it matches in are used. It is only listed as skipped if no
+    instance matched it.
+    """
+    if len(results_per_instance) == 1:
+        return results_per_instance[0]
+
+    merged = {}
+    for category in results_per_instance[0]:
+        matched_shows, matched_keys = _merge_shows([results[category][0] for results in results_per_instance])
+        skipped_shows, _ = _merge_shows([results[category][1] for results in results_per_instance], matched_keys)
+        merged[category] = (matched_shows, skipped_shows)
+    return merged
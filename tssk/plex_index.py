@@ -0,0 +1,99 @@
+"""Persistent Plex library index for TSSK - ratingKey, TVDB id and sort title of every show, refreshed incrementally"""
+
+import json
+import os
+import time
+
+from .constants import ORANGE, RESET
+from .config_loader import get_cache_directory, get_instance_key
+
+
+# Bump whenever the stored item fields change, so older indexes are rebuilt
+PLEX_INDEX_VERSION = 1
+
+DEFAULT_FULL_SYNC_HOURS = 24
+
+# Delta queries start this long before the last sync, so clock differences between TSSK and Plex don't lose updates
+SYNC_OVERLAP_SECONDS = 300
+
+# Fields of a Plex item kept in the index
+INDEXED_FIELDS = ('ratingKey', 'title', 'titleSort', 'tvdbId')
+
+
+def get_plex_index(config, plex_url):
+    """Load the library index of a Plex server, or None if it is disabled"""
+    if str(config.get('plex_index', 'false')).lower() != 'true':
+        return None
+
+    index_file = os.path.join(get_cache_directory('plex'), f"{get_instance_key(plex_url)}.json")
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+
+    return {
+        'file': index_file,
+        'full_sync_hours': float(config.get('plex_index_full_sync_hours', DEFAULT_FULL_SYNC_HOURS)),
+        'libraries': stored.get('libraries', {}) if stored.get('version') == PLEX_INDEX_VERSION else {}
+    }
+
+
+def get_updated_since(plex_index, library_key):
+    """Get the Plex timestamp to ask a library's changes since, or None if it needs a full scan.
+
+    Items deleted from Plex only disappear from the index in a full scan, which is done at least
+    every full_sync_hours.
+    """
+    library = plex_index['libraries'].get(str(library_key))
+    if library is None or time.time() - library['full_synced_at'] > plex_index['full_sync_hours'] * 3600:
+        return None
+    return int(library['synced_at'] - SYNC_OVERLAP_SECONDS)
+
+
+def update_library_index(plex_index, library_key, items, full, synced_at):
+    """Store the items of a library scan; a full scan replaces the library, a delta only updates and adds items"""
+    library = plex_index['libraries'].get(str(library_key))
+    if full or library is None:
+        library = {'items': {}, 'full_synced_at': synced_at}
+        plex_index['libraries'][str(library_key)] = library
+
+    for item in items:
+        library['items'][str(item['ratingKey'])] = {field: item[field] for field in INDEXED_FIELDS if field in item}
+    library['synced_at'] = synced_at
+
+
+def count_indexed_items(plex_index, library_key):
+    """Get the number of items in a library's index"""
+    library = plex_index['libraries'].get(str(library_key))
+    return len(library['items']) if library else 0
+
+
+def iter_indexed_items(plex_index, library_key):
+    """Yield the indexed items of a library, in the order they were first seen"""
+    library = plex_index['libraries'].get(str(library_key))
+    if library:
+        yield from library['items'].values()
+
+
+def set_indexed_sort_title(plex_index, rating_key, sort_title):
+    """Record a sort title TSSK wrote, so the index matches Plex without scanning the item again"""
+    for library in plex_index['libraries'].values():
+        item = library['items'].get(str(rating_key))
+        if item is not None:
+            item['titleSort'] = sort_title
+
+
+def save_plex_index(plex_index):
+    """Write the library index"""
+    stored = {
+        'version': PLEX_INDEX_VERSION,
+        'libraries': plex_index['libraries']
+    }
+    try:
+        temp_file = f"{plex_index['file']}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, separators=(',', ':'))
+        os.replace(temp_file, plex_index['file'])
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not write Plex index: {str(e)}{RESET}")
@@ -1,13 +1,38 @@
 """Plex API integration for TSSK - direct sort title management"""
 
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
 import requests
 
-from .constants import GREEN, ORANGE, BLUE, RED, RESET
+from .constants import GREEN, ORANGE, BLUE, RED, RESET, DEFAULT_SCAN_CONCURRENCY, DEFAULT_WRITE_CONCURRENCY
+from .http_client import http_get, http_put, http_get_json_items
 from .utils import sanitize_show_title, debug_print
+from .plex_index import (
+    get_plex_index, get_updated_since, update_library_index, count_indexed_items, iter_indexed_items,
+    set_indexed_sort_title, save_plex_index
+)
+from .sort_title_ledger import (
+    get_sort_title_ledger, start_ledger_scan, finish_ledger_scan, record_sort_title, forget_sort_title, save_sort_title_ledger
+)
 
 
 TSSK_SUFFIX = "(TSSK)"
 
+# Fields TSSK uses from Plex library items - everything else is dropped while decoding.
+# guid is only needed for shows still on a legacy agent, whose TVDB id is in it instead of in Guid.
+PLEX_ITEM_FIELDS = ('ratingKey', 'title', 'titleSort', 'guid', ('Guid', ('id',)))
+
+# Library scans: items per page
+DEFAULT_PAGE_SIZE = 500
+
+# Sort title writes: writes per second (0 = unlimited) and retries of failed writes
+DEFAULT_WRITE_RATE = 10
+DEFAULT_WRITE_RETRIES = 2
+WRITE_RETRY_BACKOFF_SECONDS = 1
+
 
 def get_plex_libraries(plex_url, plex_token, config):
     """Get all Plex libraries and their keys"""
@@ -20,7 +45,7 @@ def get_plex_libraries(plex_url, plex_token, config):
 
         debug_print(f"{BLUE}[DEBUG] Fetching Plex libraries from: {url}{RESET}", config)
 
-        response = requests.get(url, headers=headers, timeout=30)
+        response = http_get(url, headers=headers, timeout=30)
         response.raise_for_status()
 
         data = response.json()
@@ -40,61 +65,178 @@ def get_plex_libraries(plex_url, plex_token, config):
         return {}
 
 
-def get_plex_library_items(plex_url, plex_token, library_key, config):
-    """Get all items from a Plex library with their sort titles and external IDs"""
+def _parse_plex_item(item):
+    """Turn a Plex library item into the fields TSSK uses, with its external ids"""
+    item_data = {
+        'ratingKey': item.get('ratingKey'),
+        'title': item.get('title'),
+        'titleSort': item.get('titleSort', ''),
+        'guid': item.get('guid', ''),
+    }
+
+    guids = item.get('Guid', [])
+
+    for guid_entry in guids:
+        guid_id = guid_entry.get('id', '')
+        if guid_id.startswith('tvdb://'):
+            item_data['tvdbId'] = guid_id.replace('tvdb://', '')
+        elif guid_id.startswith('tmdb://'):
+            item_data['tmdbId'] = guid_id.replace('tmdb://', '')
+        elif guid_id.startswith('imdb://'):
+            item_data['imdbId'] = guid_id.replace('imdb://', '')
+
+    main_guid = item.get('guid', '')
+    if 'tvdb://' in main_guid and 'tvdbId' not in item_data:
+        item_data['tvdbId'] = main_guid.split('tvdb://')[1].split('?')[0].split('/')[0]
+    elif 'tmdb://' in main_guid and 'tmdbId' not in item_data:
+        item_data['tmdbId'] = main_guid.split('tmdb://')[1].split('?')[0].split('/')[0]
+    elif 'imdb://' in main_guid and 'imdbId' not in item_data:
+        item_data['imdbId'] = main_guid.split('imdb://')[1].split('?')[0].split('/')[0]
+
+    return item_data
+
+
+def _get_library_items_url(plex_url, library_key):
+    # Summaries are the bulk of a library listing and never used
+    return f"{plex_url.rstrip('/')}/library/sections/{library_key}/all?includeGuids=1&excludeFields=summary"
+
+
+def _get_plex_library_size(plex_url, plex_token, library_key, config, filters=None):
+    """Get the number of items in a Plex library (matching filters) with an empty page, or None if Plex doesn't say"""
     try:
-        url = f"{plex_url.rstrip('/')}/library/sections/{library_key}/all?includeGuids=1"
         headers = {
             "X-Plex-Token": plex_token,
             "Accept": "application/json"
         }
+        params = {**(filters or {}), "X-Plex-Container-Start": 0, "X-Plex-Container-Size": 0}
+        response = http_get(_get_library_items_url(plex_url, library_key), headers=headers, params=params, timeout=30)
+        response.raise_for_status()
+        total_size = response.json().get('MediaContainer', {}).get('totalSize')
+        return int(total_size) if total_size is not None else None
+    except (requests.exceptions.RequestException, ValueError) as e:
+        debug_print(f"{BLUE}[DEBUG] Could not get the size of Plex library {library_key}: {str(e)}{RESET}", config)
+        return None
 
-        debug_print(f"{BLUE}[DEBUG] Fetching Plex library items from: {url}{RESET}", config)
 
-        response = requests.get(url, headers=headers, timeout=60)
-        response.raise_for_status()
+def _get_plex_library_page(plex_url, plex_token, library_key, start, page_size, config, filters=None):
+    """Get one page of items (matching filters) from a Plex library, or None on errors"""
+    try:
+        url = _get_library_items_url(plex_url, library_key)
+        headers = {
+            "X-Plex-Token": plex_token,
+            "Accept": "application/json"
+        }
+        params = {**(filters or {}), "X-Plex-Container-Start": start, "X-Plex-Container-Size": page_size}
 
-        data = response.json()
-        items = []
-
-        metadata_list = data.get('MediaContainer', {}).get('Metadata', [])
-
-        debug_print(f"{BLUE}[DEBUG] Raw response contains {len(metadata_list)} items{RESET}", config)
-
-        for item in metadata_list:
-            item_data = {
-                'ratingKey': item.get('ratingKey'),
-                'title': item.get('title'),
-                'titleSort': item.get('titleSort', ''),
-                'year': item.get('year'),
-                'guid': item.get('guid', ''),
-            }
-
-            guids = item.get('Guid', [])
-
-            for guid_entry in guids:
-                guid_id = guid_entry.get('id', '')
-                if guid_id.startswith('tvdb://'):
-                    item_data['tvdbId'] = guid_id.replace('tvdb://', '')
-                elif guid_id.startswith('tmdb://'):
-                    item_data['tmdbId'] = guid_id.replace('tmdb://', '')
-                elif guid_id.startswith('imdb://'):
-                    item_data['imdbId'] = guid_id.replace('imdb://', '')
-
-            main_guid = item.get('guid', '')
-            if 'tvdb://' in main_guid and 'tvdbId' not in item_data:
-                item_data['tvdbId'] = main_guid.split('tvdb://')[1].split('?')[0].split('/')[0]
-            elif 'tmdb://' in main_guid and 'tmdbId' not in item_data:
-                item_data['tmdbId'] = main_guid.split('tmdb://')[1].split('?')[0].split('/')[0]
-            elif 'imdb://' in main_guid and 'imdbId' not in item_data:
-                item_data['imdbId'] = main_guid.split('imdb://')[1].split('?')[0].split('/')[0]
-
-            items.append(item_data)
-
-        return items
+        debug_print(f"{BLUE}[DEBUG] Fetching Plex library items from: {url} (items {start}-{start + page_size - 1}){RESET}", config)
+
+        return http_get_json_items(url, PLEX_ITEM_FIELDS, array_key='Metadata', headers=headers, params=params, timeout=60)
     except requests.exceptions.RequestException as e:
         print(f"{RED}Error fetching Plex library items: {str(e)}{RESET}")
-        return []
+        return None
+
+
+def iter_plex_library_items(plex_url, plex_token, library_keys, config, library_filters=None, failed_libraries=None):
+    """Yield (library_number, position, item) for the items of the given Plex libraries as their pages arrive.
+
+    library_number is the index in library_keys and position the item's place in its library.
+    Pages of all libraries are fetched at the same time, at most plex_scan_concurrency at once,
+    so only the pages in flight are held in memory. Libraries whose size Plex doesn't report are
+    read one page after the other until a short page. library_filters holds extra query parameters
+    per library (e.g. a Plex filter), the numbers of libraries with pages that couldn't be fetched
+    are added to the failed_libraries set when given.
+    """
+    if library_filters is None:
+        library_filters = [None] * len(library_keys)
+    page_size = max(1, int(config.get('plex_page_size', DEFAULT_PAGE_SIZE)))
+    scan_concurrency = max(1, int(config.get('plex_scan_concurrency', DEFAULT_SCAN_CONCURRENCY)))
+
+    with ThreadPoolExecutor(max_workers=scan_concurrency) as executor:
+        library_sizes = list(executor.map(
+            lambda library_key, filters: _get_plex_library_size(plex_url, plex_token, library_key, config, filters),
+            library_keys, library_filters
+        ))
+
+        pending = {}
+
+        def submit_page(library_number, start):
+            future = executor.submit(
+                _get_plex_library_page, plex_url, plex_token, library_keys[library_number], start, page_size, config,
+                library_filters[library_number]
+            )
+            pending[future] = (library_number, start)
+
+        for library_number, library_size in enumerate(library_sizes):
+            if library_size is None:
+                submit_page(library_number, 0)
+            else:
+                for start in range(0, library_size, page_size):
+                    submit_page(library_number, start)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                library_number, start = pending.pop(future)
+                page = future.result()
+                if page is None:
+                    if failed_libraries is not None:
+                        failed_libraries.add(library_number)
+                    continue
+                if library_sizes[library_number] is None and len(page) >= page_size:
+                    submit_page(library_number, start + page_size)
+                for offset, item in enumerate(page):
+                    yield library_number, start + offset, _parse_plex_item(item)
+
+
+def refresh_plex_index(plex_index, plex_url, plex_token, library_keys, config):
+    """Bring the index of the given libraries up to date with Plex.
+
+    Libraries synced recently only have the items updated (or added) since then fetched. A library
+    whose size no longer matches its index lost items and is scanned in full. Libraries with pages
+    that couldn't be fetched keep their previous index; their keys are returned.
+    """
+    def scan(keys, filters):
+        # Time of the scan, taken before its first request so changes during the scan are seen next time
+        synced_at = time.time()
+        items = [[] for _ in keys]
+        failed_libraries = set()
+        for library_number, _, item in iter_plex_library_items(plex_url, plex_token, keys, config, filters, failed_libraries):
+            items[library_number].append(item)
+        for library_number, library_key in enumerate(keys):
+            if library_number in failed_libraries:
+                print(f"{ORANGE}Warning: Could not read Plex library {library_key} completely, keeping its previous index{RESET}")
+                continue
+            update_library_index(plex_index, library_key, items[library_number], filters[library_number] is None, synced_at)
+        return [len(library_items) for library_items in items], {keys[library_number] for library_number in failed_libraries}
+
+    updated_since = [get_updated_since(plex_index, library_key) for library_key in library_keys]
+    item_counts, failed_keys = scan(
+        library_keys, [None if since is None else {'updatedAt>>': since} for since in updated_since]
+    )
+
+    # Deleted items don't show up as changes, only in the size of the library
+    delta_keys = [library_key for library_key, since in zip(library_keys, updated_since) if since is not None]
+    rescan_keys = [
+        library_key for library_key in delta_keys
+        if _get_plex_library_size(plex_url, plex_token, library_key, config) != count_indexed_items(plex_index, library_key)
+    ]
+    if rescan_keys:
+        _, rescan_failed_keys = scan(rescan_keys, [None] * len(rescan_keys))
+        failed_keys = (failed_keys - set(rescan_keys)) | rescan_failed_keys
+
+    changed_items = sum(
+        count for library_key, count, since in zip(library_keys, item_counts, updated_since)
+        if since is not None and library_key not in rescan_keys
+    )
+    full_scans = len(library_keys) - len(delta_keys) + len(rescan_keys)
+    print(f"Plex index: {full_scans} of {len(library_keys)} libraries scanned in full, {changed_items} changed shows fetched for the others")
+    return failed_keys
+
+
+def get_plex_library_items(plex_url, plex_token, library_key, config):
+    """Get all items from a Plex library with their sort titles and external IDs"""
+    items = sorted(iter_plex_library_items(plex_url, plex_token, [library_key], config), key=lambda entry: entry[1])
+    return [item for _, _, item in items]
 
 
 def update_plex_sort_title(plex_url, plex_token, rating_key, new_sort_title, config):
@@ -111,7 +253,7 @@ def update_plex_sort_title(plex_url, plex_token, rating_key, new_sort_title, con
 
         debug_print(f"{BLUE}[DEBUG] Updating sort title - URL: {url}, params: {params}{RESET}", config)
 
-        response = requests.put(url, headers=headers, params=params, timeout=30)
+        response = http_put(url, headers=headers, params=params, timeout=30)
         response.raise_for_status()
 
         return True
@@ -135,7 +277,7 @@ def reset_plex_sort_title(plex_url, plex_token, rating_key, original_title, conf
 
         debug_print(f"{BLUE}[DEBUG] Resetting sort title - URL: {url}, params: {params}{RESET}", config)
 
-        response = requests.put(url, headers=headers, params=params, timeout=30)
+        response = http_put(url, headers=headers, params=params, timeout=30)
         response.raise_for_status()
 
         return True
@@ -144,69 +286,104 @@ def reset_plex_sort_title(plex_url, plex_token, rating_key, original_title, conf
         return False
 
 
-def update_plex_sort_titles(plex_url, plex_token, tv_libraries, matched_shows, all_series, config):
-    """Update sort titles in Plex for matched shows, reset sort titles for shows no longer matching.
+def _new_rate_limiter(rate):
+    """Create a limiter spacing calls at least 1/rate seconds apart over all threads"""
+    return {'interval': 1 / rate if rate > 0 else 0, 'next_time': 0.0, 'lock': threading.Lock()}
 
-    Sort titles set by TSSK use the format: !{YYYYMMDD} {CleanTitle} (TSSK)
-    The (TSSK) suffix allows UMTK to distinguish TSSK-managed sort titles and skip resetting them.
+
+def _wait_for_rate_limit(rate_limiter):
+    with rate_limiter['lock']:
+        now = time.monotonic()
+        start = max(now, rate_limiter['next_time'])
+        rate_limiter['next_time'] = start + rate_limiter['interval']
+    if start > now:
+        time.sleep(start - now)
+
+
+def _write_sort_title(write, args, retries, rate_limiter):
+    """Call a sort title write function, retrying failures; returns (success, retries used)"""
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(WRITE_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+        _wait_for_rate_limit(rate_limiter)
+        if write(*args):
+            return True, attempt
+    return False, retries
+
+
+def find_plex_items_by_tvdb(plex_url, plex_token, library_keys, tvdb_id, title, config):
+    """Find the items with a TVDB ID in the given Plex libraries without reading the libraries.
+
+    Plex can't filter on external IDs, so the libraries are searched for the title (without a
+    trailing year or country like "(2005)") and only results whose GUIDs include the TVDB ID are kept.
     """
-    if not plex_url or not plex_token:
-        debug_print(f"{BLUE}[DEBUG] Plex URL or token not configured, skipping sort title updates{RESET}", config)
-        return
+    search_title = re.sub(r'\s*\([^)]*\)$', '', title) or title
+    headers = {
+        "X-Plex-Token": plex_token,
+        "Accept": "application/json"
+    }
+    matches = []
+    for library_key in library_keys:
+        try:
+            url = _get_library_items_url(plex_url, library_key)
+            debug_print(f"{BLUE}[DEBUG] Searching Plex library {library_key} for '{search_title}' (TVDB: {tvdb_id}){RESET}", config)
+            items = http_get_json_items(url, PLEX_ITEM_FIELDS, array_key='Metadata', headers=headers,
+                                        params={"title": search_title}, timeout=30)
+        except requests.exceptions.RequestException as e:
+            print(f"{RED}Error searching Plex library items: {str(e)}{RESET}")
+            continue
+        matches.extend(item for item in map(_parse_plex_item, items) if item.get('tvdbId') == str(tvdb_id))
+    return matches
 
-    libraries = get_plex_libraries(plex_url, plex_token, config)
-    if not libraries:
-        print(f"{RED}Could not fetch Plex libraries{RESET}")
-        return
 
-    if isinstance(tv_libraries, str):
-        tv_library_names = [lib.strip() for lib in tv_libraries.split(',') if lib.strip()]
-    else:
-        tv_library_names = tv_libraries if tv_libraries else []
+def _get_show_sort_title(show):
+    date_str = show['airDate'].replace('-', '')
+    clean_title = sanitize_show_title(show['title'])
+    return f"!{date_str} {clean_title} {TSSK_SUFFIX}"
 
-    debug_print(f"{BLUE}[DEBUG] Configured TV libraries: {tv_library_names}{RESET}", config)
 
-    if not tv_library_names:
-        print(f"{ORANGE}No TV libraries configured for Plex sort title updates{RESET}")
-        return
+def _new_update(plex_url, plex_token, rating_key, tvdb_id, original_title, new_sort_title, config):
+    return (update_plex_sort_title, (plex_url, plex_token, rating_key, new_sort_title, config),
+            f"Updated sort title for {original_title}: {new_sort_title}", tvdb_id, original_title)
 
-    # Fetch all items from configured TV libraries
-    all_plex_items = []
-    for lib_name in tv_library_names:
-        if lib_name in libraries and libraries[lib_name]['type'] == 'show':
-            lib_key = libraries[lib_name]['key']
-            items = get_plex_library_items(plex_url, plex_token, lib_key, config)
-            all_plex_items.extend(items)
-            print(f"{GREEN}Found {len(items)} shows in Plex library: {lib_name}{RESET}")
-        else:
-            print(f"{ORANGE}TV library '{lib_name}' not found in Plex or is not a show library{RESET}")
 
-    if not all_plex_items:
-        print(f"{ORANGE}No TV items found in configured Plex libraries{RESET}")
-        return
+def _new_reset(plex_url, plex_token, rating_key, tvdb_id, original_title, config):
+    return (reset_plex_sort_title, (plex_url, plex_token, rating_key, original_title, config),
+            f"Reset sort title for {original_title}", tvdb_id, original_title)
 
-    # Build set of TVDB IDs that should have modified sort titles
-    valid_tvdb_ids = {}
-    for show in matched_shows:
-        tvdb_id = show.get('tvdbId')
-        air_date = show.get('airDate')
-        title = show.get('title', '')
-        if tvdb_id and air_date and title:
-            valid_tvdb_ids[str(tvdb_id)] = show
 
-    debug_print(f"{BLUE}[DEBUG] Valid TVDB IDs for sort title: {list(valid_tvdb_ids.keys())}{RESET}", config)
+def _get_scan_writes(plex_url, plex_token, scanned_libraries, valid_tvdb_ids, plex_index, ledger, config,
+                     unindexed_library_keys=()):
+    """Get the sort title writes for every item of the scanned libraries, or None if they have no items.
 
-    # Build Plex item index by TVDB ID
-    plex_items_by_tvdb = {}
-    for plex_item in all_plex_items:
-        tvdb_id = plex_item.get('tvdbId')
-        if tvdb_id:
-            plex_items_by_tvdb[str(tvdb_id)] = plex_item
+    Reads the items from the Plex index when it is enabled, otherwise from Plex. Rebuilds the
+    sort title ledger from the TSSK sort titles found when it is enabled; unindexed_library_keys
+    are the libraries the index couldn't be refreshed for, which leave the scan incomplete.
+    """
+    library_keys = [lib_key for _, lib_key in scanned_libraries]
+    failed_libraries = set()
+    if plex_index is not None:
+        failed_libraries = {
+            library_number for library_number, lib_key in enumerate(library_keys) if lib_key in unindexed_library_keys
+        }
+        plex_items = (
+            (library_number, position, plex_item)
+            for library_number, lib_key in enumerate(library_keys)
+            for position, plex_item in enumerate(iter_indexed_items(plex_index, lib_key))
+        )
+    else:
+        plex_items = iter_plex_library_items(plex_url, plex_token, library_keys, config, failed_libraries=failed_libraries)
+    if ledger is not None:
+        start_ledger_scan(ledger)
 
-    updated_sort_titles = 0
-    reset_sort_titles = 0
+    # Index the items of all configured TV libraries by TVDB ID as they arrive, collecting
+    # the writes to send afterwards through a bounded, rate limited pool
+    plex_items_by_tvdb = {}
+    library_item_counts = [0] * len(scanned_libraries)
+    writes = []
 
-    for plex_item in all_plex_items:
+    for library_number, position, plex_item in plex_items:
+        library_item_counts[library_number] += 1
         tvdb_id = plex_item.get('tvdbId')
         rating_key = plex_item.get('ratingKey')
         current_sort_title = plex_item.get('titleSort', '')
@@ -220,7 +397,10 @@ def update_plex_sort_titles(plex_url, plex_token, tv_libraries, matched_shows, a
             continue
 
         tvdb_id_str = str(tvdb_id)
+        plex_items_by_tvdb[tvdb_id_str] = plex_item
         should_have_date = tvdb_id_str in valid_tvdb_ids
+        if has_tssk_sort and ledger is not None:
+            record_sort_title(ledger, rating_key, tvdb_id_str, original_title, current_sort_title)
 
         if should_have_date or has_tssk_sort:
             debug_print(f"{BLUE}[DEBUG] Processing '{original_title}' (TVDB: {tvdb_id_str}){RESET}", config)
@@ -229,24 +409,211 @@ def update_plex_sort_titles(plex_url, plex_token, tv_libraries, matched_shows, a
             debug_print(f"{BLUE}[DEBUG]   should_have_date: {should_have_date}{RESET}", config)
 
         if should_have_date:
-            show_data = valid_tvdb_ids[tvdb_id_str]
-            date_str = show_data['airDate'].replace('-', '')
-            clean_title = sanitize_show_title(show_data['title'])
-            new_sort_title = f"!{date_str} {clean_title} {TSSK_SUFFIX}"
+            new_sort_title = _get_show_sort_title(valid_tvdb_ids[tvdb_id_str])
 
             if current_sort_title != new_sort_title:
                 debug_print(f"{BLUE}[DEBUG] Will update sort title from '{current_sort_title}' to '{new_sort_title}'{RESET}", config)
-                if update_plex_sort_title(plex_url, plex_token, rating_key, new_sort_title, config):
-                    updated_sort_titles += 1
-                    print(f"{GREEN}Updated sort title for {original_title}: {new_sort_title}{RESET}")
+                writes.append(((library_number, position), _new_update(
+                    plex_url, plex_token, rating_key, tvdb_id_str, original_title, new_sort_title, config
+                )))
 
         elif has_tssk_sort:
             # Show has a TSSK sort title but is no longer in the matched list - reset it
             debug_print(f"{BLUE}[DEBUG] Will reset sort title for '{original_title}'{RESET}", config)
-            if reset_plex_sort_title(plex_url, plex_token, rating_key, original_title, config):
+            writes.append(((library_number, position), _new_reset(
+                plex_url, plex_token, rating_key, tvdb_id_str, original_title, config
+            )))
+
+    for (lib_name, _), item_count in zip(scanned_libraries, library_item_counts):
+        print(f"{GREEN}Found {item_count} shows in Plex library: {lib_name}{RESET}")
+
+    if ledger is not None:
+        for library_number in sorted(failed_libraries):
+            print(f"{ORANGE}Warning: Could not read Plex library {scanned_libraries[library_number][0]} completely, "
+                  f"keeping the previous sort title ledger{RESET}")
+        unmatched_tvdb_ids = [tvdb_id for tvdb_id in valid_tvdb_ids if tvdb_id not in plex_items_by_tvdb]
+        finish_ledger_scan(ledger, not failed_libraries, unmatched_tvdb_ids)
+
+    if not any(library_item_counts):
+        return None
+
+    # Pages arrive in any order, write in library order so the log is stable
+    writes.sort(key=lambda write: write[0])
+    return [write for _, write in writes]
+
+
+def _get_ledger_writes(plex_url, plex_token, library_keys, valid_tvdb_ids, plex_index, ledger, config):
+    """Get the sort title writes from the ledger, looking up only the shows that newly need a sort title.
+
+    Items in the ledger are updated or reset without asking Plex. Matched shows not in it are found
+    in the Plex index when it is enabled, otherwise with a title search per show. Returns None when
+    a title search missed a show the last full scan didn't know was missing, so the ledger has to be
+    rebuilt with a full scan.
+    """
+    writes = []
+    ledger_tvdb_ids = set()
+    for rating_key, entry in ledger['entries'].items():
+        tvdb_id = entry['tvdbId']
+        ledger_tvdb_ids.add(tvdb_id)
+        if tvdb_id in valid_tvdb_ids:
+            new_sort_title = _get_show_sort_title(valid_tvdb_ids[tvdb_id])
+            if entry['sortTitle'] != new_sort_title:
+                writes.append(_new_update(plex_url, plex_token, rating_key, tvdb_id, entry['title'], new_sort_title, config))
+        else:
+            writes.append(_new_reset(plex_url, plex_token, rating_key, tvdb_id, entry['title'], config))
+
+    new_shows = [(tvdb_id, show) for tvdb_id, show in valid_tvdb_ids.items() if tvdb_id not in ledger_tvdb_ids]
+    if plex_index is not None:
+        indexed_items_by_tvdb = {}
+        for lib_key in library_keys:
+            for plex_item in iter_indexed_items(plex_index, lib_key):
+                if plex_item.get('tvdbId'):
+                    indexed_items_by_tvdb.setdefault(str(plex_item['tvdbId']), []).append(plex_item)
+        found_items = [indexed_items_by_tvdb.get(tvdb_id, []) for tvdb_id, _ in new_shows]
+    else:
+        scan_concurrency = max(1, int(config.get('plex_scan_concurrency', DEFAULT_SCAN_CONCURRENCY)))
+        with ThreadPoolExecutor(max_workers=scan_concurrency) as executor:
+            found_items = list(executor.map(
+                lambda new_show: find_plex_items_by_tvdb(
+                    plex_url, plex_token, library_keys, new_show[0], new_show[1]['title'], config
+                ),
+                new_shows
+            ))
+
+    missed_shows = 0
+    for (tvdb_id, show), plex_items in zip(new_shows, found_items):
+        if not plex_items:
+            # The index holds every show, but a title search misses shows titled differently in Plex
+            if plex_index is None and tvdb_id not in ledger['unmatched']:
+                print(f"{ORANGE}Warning: '{show['title']}' (TVDB: {tvdb_id}) not found in Plex by title{RESET}")
+                missed_shows += 1
+            else:
+                debug_print(f"{BLUE}[DEBUG] '{show['title']}' (TVDB: {tvdb_id}) not found in Plex{RESET}", config)
+        new_sort_title = _get_show_sort_title(show)
+        for plex_item in plex_items:
+            if plex_item.get('titleSort', '') == new_sort_title:
+                record_sort_title(ledger, plex_item['ratingKey'], tvdb_id, plex_item.get('title', ''), new_sort_title)
+                continue
+            writes.append(_new_update(
+                plex_url, plex_token, plex_item['ratingKey'], tvdb_id, plex_item.get('title', ''), new_sort_title, config
+            ))
+
+    print(f"Sort title ledger: {len(ledger['entries'])} shows with a TSSK sort title, "
+          f"{len(new_shows)} newly matched shows looked up")
+    if missed_shows:
+        print(f"{ORANGE}{missed_shows} newly matched shows not found by title, rebuilding the sort title ledger with a full library scan{RESET}")
+        return None
+    return writes
+
+
+def update_plex_sort_titles(plex_url, plex_token, tv_libraries, matched_shows, all_series, config):
+    """Update sort titles in Plex for matched shows, reset sort titles for shows no longer matching.
+
+    Sort titles set by TSSK use the format: !{YYYYMMDD} {CleanTitle} (TSSK)
+    The (TSSK) suffix allows UMTK to distinguish TSSK-managed sort titles and skip resetting them.
+    With the sort title ledger enabled, only shows whose sort title changes are sent to or looked up in Plex.
+    """
+    if not plex_url or not plex_token:
+        debug_print(f"{BLUE}[DEBUG] Plex URL or token not configured, skipping sort title updates{RESET}", config)
+        return
+
+    libraries = get_plex_libraries(plex_url, plex_token, config)
+    if not libraries:
+        print(f"{RED}Could not fetch Plex libraries{RESET}")
+        return
+
+    if isinstance(tv_libraries, str):
+        tv_library_names = [lib.strip() for lib in tv_libraries.split(',') if lib.strip()]
+    else:
+        tv_library_names = tv_libraries if tv_libraries else []
+
+    debug_print(f"{BLUE}[DEBUG] Configured TV libraries: {tv_library_names}{RESET}", config)
+
+    if not tv_library_names:
+        print(f"{ORANGE}No TV libraries configured for Plex sort title updates{RESET}")
+        return
+
+    # Build set of TVDB IDs that should have modified sort titles
+    valid_tvdb_ids = {}
+    for show in matched_shows:
+        tvdb_id = show.get('tvdbId')
+        air_date = show.get('airDate')
+        title = show.get('title', '')
+        if tvdb_id and air_date and title:
+            valid_tvdb_ids[str(tvdb_id)] = show
+
+    debug_print(f"{BLUE}[DEBUG] Valid TVDB IDs for sort title: {list(valid_tvdb_ids.keys())}{RESET}", config)
+
+    scanned_libraries = []
+    for lib_name in tv_library_names:
+        if lib_name in libraries and libraries[lib_name]['type'] == 'show':
+            scanned_libraries.append((lib_name, libraries[lib_name]['key']))
+        else:
+            print(f"{ORANGE}TV library '{lib_name}' not found in Plex or is not a show library{RESET}")
+
+    # With the Plex index only the changes since the last run are fetched, otherwise every library is read
+    library_keys = [lib_key for _, lib_key in scanned_libraries]
+    plex_index = get_plex_index(config, plex_url)
+    unindexed_library_keys = set()
+    if plex_index is not None:
+        unindexed_library_keys = refresh_plex_index(plex_index, plex_url, plex_token, library_keys, config)
+
+    ledger = get_sort_title_ledger(config, plex_url)
+    writes = None
+    if ledger is not None and ledger['entries'] is not None:
+        writes = _get_ledger_writes(plex_url, plex_token, library_keys, valid_tvdb_ids, plex_index, ledger, config)
+    if writes is None:
+        writes = _get_scan_writes(
+            plex_url, plex_token, scanned_libraries, valid_tvdb_ids, plex_index, ledger, config, unindexed_library_keys
+        )
+        if writes is None:
+            print(f"{ORANGE}No TV items found in configured Plex libraries{RESET}")
+            if plex_index is not None:
+                save_plex_index(plex_index)
+            return
+
+    write_concurrency = max(1, int(config.get('plex_write_concurrency', DEFAULT_WRITE_CONCURRENCY)))
+    write_retries = max(0, int(config.get('plex_write_retries', DEFAULT_WRITE_RETRIES)))
+    rate_limiter = _new_rate_limiter(float(config.get('plex_write_rate', DEFAULT_WRITE_RATE)))
+
+    updated_sort_titles = 0
+    reset_sort_titles = 0
+    retried_writes = 0
+    failed_writes = 0
+
+    with ThreadPoolExecutor(max_workers=write_concurrency) as executor:
+        results = executor.map(
+            lambda write: _write_sort_title(write[0], write[1], write_retries, rate_limiter), writes
+        )
+        # map yields in submission order, so the log reads the same whatever order the writes finish in
+        for (write, args, message, tvdb_id, original_title), (success, retries) in zip(writes, results):
+            retried_writes += retries
+            if not success:
+                failed_writes += 1
+                continue
+            rating_key = args[2]
+            if write is update_plex_sort_title:
+                updated_sort_titles += 1
+                new_sort_title = args[3]
+                if ledger is not None:
+                    record_sort_title(ledger, rating_key, tvdb_id, original_title, new_sort_title)
+            else:
                 reset_sort_titles += 1
-                print(f"{GREEN}Reset sort title for {original_title}{RESET}")
+                new_sort_title = sanitize_show_title(args[3])
+                if ledger is not None:
+                    forget_sort_title(ledger, rating_key)
+            if plex_index is not None:
+                set_indexed_sort_title(plex_index, rating_key, new_sort_title)
+            print(f"{GREEN}{message}{RESET}")
+
+    if plex_index is not None:
+        save_plex_index(plex_index)
+    if ledger is not None:
+        save_sort_title_ledger(ledger)
 
     print(f"\n{GREEN}TSSK Plex sort title update summary:{RESET}")
     print(f"Sort titles updated: {updated_sort_titles}")
     print(f"Sort titles reset: {reset_sort_titles}")
+    if retried_writes or failed_writes:
+        print(f"Sort title writes retried: {retried_writes}")
+        print(f"Sort title writes failed: {failed_writes}")
@@ -0,0 +1,69 @@
+"""Series-level pre-filter for TSSK - rules out series before their episodes are fetched"""
+
+from datetime import datetime, timedelta, timezone
+
+from .utils import convert_utc_to_local
+from .sonarr import has_ignore_finale_tag
+
+
+# Categories looking at episodes airing within future_days / that aired within recent_days
+FUTURE_CATEGORIES = ('new_season_soon', 'upcoming_episode', 'upcoming_finale')
+RECENT_CATEGORIES = ('new_season_started', 'season_finale', 'final_episode')
+
+
+def get_window_padding(utc_offset):
+    """Padding for UTC time windows, so the UTC offset applied by the classifiers can't push an episode outside of them"""
+    return timedelta(days=1, hours=abs(utc_offset))
+
+
+def build_series_prefilter(category_windows, utc_offset=0, skip_unmonitored=False, ignore_finales_tags=None, tag_mapping=None):
+    """Create a check telling whether a series can possibly land in any of the enabled categories.
+
+    category_windows maps each enabled category to its future_days/recent_days value. Only the
+    /series payload is used. Sonarr's previousAiring and nextAiring only cover monitored episodes,
+    so they are only used to rule a series out when skip_unmonitored is enabled, as every match
+    then needs a monitored episode. A series that is ruled out can never match.
+    """
+    now_utc = datetime.now(timezone.utc)
+    padding = get_window_padding(utc_offset)
+
+    def may_match(series):
+        try:
+            next_airing = convert_utc_to_local(series.get('nextAiring'), 0)
+            previous_airing = convert_utc_to_local(series.get('previousAiring'), 0)
+        except ValueError:
+            return True
+
+        statistics = series.get('statistics')
+        has_downloads = statistics is None or statistics.get('episodeFileCount', 1) > 0
+        ignores_finales = has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping)
+        status = series.get('status')
+
+        for category, days in category_windows.items():
+            if category in FUTURE_CATEGORIES:
+                if category == 'upcoming_finale' and ignores_finales:
+                    continue
+                if skip_unmonitored and (next_airing is None or next_airing > now_utc + timedelta(days=days) + padding):
+                    continue
+                return True
+
+            # All recent categories need a downloaded episode
+            if not has_downloads:
+                continue
+            if category == 'season_finale' and (status not in ['continuing', 'upcoming'] or ignores_finales):
+                continue
+            if category == 'final_episode' and (status != 'ended' or ignores_finales):
+                continue
+            if skip_unmonitored:
+                if not series.get('monitored', True):
+                    continue
+                aired_recently = previous_airing is not None and previous_airing >= now_utc - timedelta(days=days) - padding
+                # Finales also count when they were downloaded ahead of a future air date
+                downloaded_ahead = category != 'new_season_started' and next_airing is not None
+                if not aired_recently and not downloaded_ahead:
+                    continue
+            return True
+
+        return False
+
+    return may_match
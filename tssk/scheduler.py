@@ -0,0 +1,205 @@
+"""Daemon mode for TSSK - runs on a CRON schedule inside one long-lived process"""
+
+import signal
+import time
+from datetime import datetime, timedelta
+
+from .constants import GREEN, ORANGE, BLUE, RED, RESET
+
+
+DEFAULT_CRON = '0 2 * * *'
+
+# Longest single sleep, so clock changes and signals are noticed in time
+MAX_SLEEP_SECONDS = 60
+
+# Bounds of the time between runs when scheduling on category changes
+DEFAULT_MIN_INTERVAL_MINUTES = 15
+DEFAULT_MAX_INTERVAL_HOURS = 24
+
+
+def parse_cron_field(field, min_val, max_val):
+    """Parse one field of a cron expression (e.g. '*', '1-5', '*/15', '0,30') into a sorted list of values"""
+    values = set()
+
+    for part in field.split(','):
+        part = part.strip()
+
+        if '/' in part:
+            range_part, step = part.split('/')
+            step = int(step)
+            if step <= 0:
+                raise ValueError(f"Invalid step in cron field '{field}'")
+
+            if range_part == '*':
+                start, end = min_val, max_val
+            elif '-' in range_part:
+                start, end = map(int, range_part.split('-'))
+            else:
+                start = int(range_part)
+                end = max_val
+
+            values.update(range(start, end + 1, step))
+
+        elif '-' in part:
+            start, end = map(int, part.split('-'))
+            values.update(range(start, end + 1))
+
+        elif part == '*':
+            values.update(range(min_val, max_val + 1))
+
+        else:
+            values.add(int(part))
+
+    if not values or min(values) < min_val or max(values) > max_val:
+        raise ValueError(f"Cron field '{field}' is out of range {min_val}-{max_val}")
+    return sorted(values)
+
+
+def get_next_cron_time(cron_expression, now=None):
+    """Get the first minute after now matching a 5-field cron expression, or None if there is none within a year.
+
+    Raises ValueError if the expression can't be parsed. Like cron, a day matches either the
+    day-of-month or the day-of-week field when both are restricted; Sunday is 0 or 7.
+    """
+    parts = cron_expression.split()
+    if len(parts) != 5:
+        raise ValueError(f"Cron expression '{cron_expression}' must have 5 fields")
+
+    minute_field, hour_field, day_field, month_field, dow_field = parts
+    minutes = parse_cron_field(minute_field, 0, 59)
+    hours = parse_cron_field(hour_field, 0, 23)
+    days = parse_cron_field(day_field, 1, 31) if day_field != '*' else None
+    months = parse_cron_field(month_field, 1, 12) if month_field != '*' else None
+    dows = {dow % 7 for dow in parse_cron_field(dow_field, 0, 7)} if dow_field != '*' else None
+
+    def day_matches(moment):
+        day_match = days is None or moment.day in days
+        dow_match = dows is None or (moment.weekday() + 1) % 7 in dows
+        if days is not None and dows is not None:
+            return day_match or dow_match
+        return day_match and dow_match
+
+    if now is None:
+        now = datetime.now()
+    search_time = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+    end_time = search_time + timedelta(days=366)
+
+    while search_time <= end_time:
+        if months and search_time.month not in months:
+            search_time = search_time.replace(day=1, hour=0, minute=0) + timedelta(days=32)
+            search_time = search_time.replace(day=1)
+            continue
+
+        if not day_matches(search_time):
+            search_time = search_time.replace(hour=0, minute=0) + timedelta(days=1)
+            continue
+
+        if search_time.hour not in hours:
+            search_time = search_time.replace(minute=0) + timedelta(hours=1)
+            continue
+
+        if search_time.minute not in minutes:
+            search_time += timedelta(minutes=1)
+            continue
+
+        return search_time
+
+    return None
+
+
+def get_next_event_time(next_transition, min_interval_minutes=DEFAULT_MIN_INTERVAL_MINUTES,
+                        max_interval_hours=DEFAULT_MAX_INTERVAL_HOURS, now=None):
+    """Get the local time of the next run when scheduling on category changes.
+
+    next_transition is the (UTC) moment the output is next expected to change, or None. The run
+    happens then, but no sooner than the minimum and no later than the maximum interval from now.
+    """
+    if now is None:
+        now = datetime.now()
+    earliest = now + timedelta(minutes=max(0.0, min_interval_minutes))
+    latest = max(earliest, now + timedelta(hours=max_interval_hours))
+    if next_transition is None:
+        return latest
+
+    # Just after the moment itself, so the run sees the change
+    next_run = next_transition.astimezone().replace(tzinfo=None) + timedelta(seconds=1)
+    return min(max(next_run, earliest), latest)
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def _run_safely(run):
+    """Run once, keeping the daemon alive whatever happens during the run"""
+    try:
+        return run()
+    except SystemExit as e:
+        return e.code
+    except Exception as e:
+        print(f"{RED}Unexpected error: {str(e)}{RESET}")
+        return 1
+
+
+def _wait_for_next_run(next_run, wake_event, debounce_seconds):
+    """Sleep until next_run, or until wake_event is set and no new wake-up came in for debounce_seconds"""
+    while True:
+        remaining = (next_run - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        if wake_event is None:
+            time.sleep(min(remaining, MAX_SLEEP_SECONDS))
+            continue
+        if wake_event.wait(min(remaining, MAX_SLEEP_SECONDS)):
+            break
+
+    # Let a burst of events (e.g. a season pack being imported) settle into one run
+    wake_event.clear()
+    print(f"{BLUE}Run requested, starting in {debounce_seconds} seconds unless more requests come in{RESET}", flush=True)
+    while wake_event.wait(debounce_seconds):
+        wake_event.clear()
+
+
+def run_daemon(run, cron_expression=DEFAULT_CRON, wake_event=None, debounce_seconds=0, get_next_run=None,
+               get_debounce_seconds=None):
+    """Call run right away and then on every time the cron expression matches, until stopped.
+
+    The process, and with it the pooled HTTP sessions and in-memory caches, stays alive between
+    runs. Failed runs are reported and the daemon waits for the next scheduled time. Setting
+    wake_event (a threading.Event) requests a run before then, once it has stayed quiet for
+    debounce_seconds. get_next_run, if given, is called after every run and returns the local
+    time of the next one, or None to follow the cron expression. get_debounce_seconds, if given,
+    replaces debounce_seconds and is called before every wait.
+    """
+    try:
+        get_next_cron_time(cron_expression)
+    except ValueError as e:
+        print(f"{RED}Invalid CRON expression: {str(e)}{RESET}")
+        return 1
+
+    # docker stop sends SIGTERM, handle it like Ctrl+C
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+    if get_next_run is None:
+        print(f"{BLUE}TSSK daemon started with cron schedule: {cron_expression}{RESET}")
+    else:
+        print(f"{BLUE}TSSK daemon started{RESET}")
+
+    try:
+        while True:
+            exit_code = _run_safely(run)
+            if exit_code:
+                print(f"{ORANGE}Run failed, waiting for the next scheduled run{RESET}")
+
+            next_run = get_next_run() if get_next_run is not None else None
+            if next_run is None:
+                next_run = get_next_cron_time(cron_expression)
+            if next_run is None:
+                print(f"{RED}Unable to calculate next cron time within 366 days{RESET}")
+                return 1
+            print(f"{BLUE}Next execution scheduled for: {next_run.strftime('%Y-%m-%d %H:%M:%S')}{RESET}\n", flush=True)
+            if get_debounce_seconds is not None:
+                debounce_seconds = get_debounce_seconds()
+            _wait_for_next_run(next_run, wake_event, debounce_seconds)
+    except KeyboardInterrupt:
+        print(f"{GREEN}TSSK daemon stopped{RESET}")
+        return 0
@@ -1,12 +1,91 @@
 """Sonarr API interaction functions for TSSK"""
 
+import json
+import os
+import queue
+import threading
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import timedelta
+from itertools import islice
 
 from .constants import GREEN, BLUE, ORANGE, RED, RESET
+from .config_loader import get_cache_directory
+from .http_client import http_get, http_get_json_items, RequestRejected
+from .episode_cache import load_cached_episodes, save_cached_episodes
+from .concurrency import get_concurrency_limit, record_request
+from .hedging import hedged_call, count_extra_requests, wait_for_extra_requests
+
+
+# API paths Sonarr can be reached at, directly or behind a reverse proxy with a URL base
+SONARR_API_PATHS = ('/api/v3', '/sonarr/api/v3')
+
+# Connect timeout of the API path probes, so an unreachable candidate doesn't take the full sonarr_timeout
+PROBE_CONNECT_TIMEOUT = 5
+
+# Maximum number of days requested per Sonarr calendar call
+CALENDAR_CHUNK_DAYS = 31
+
+# Fields TSSK uses from Sonarr's /series and /episode payloads - everything else is dropped while decoding
+SERIES_FIELDS = (
+    'id', 'title', 'tvdbId', 'status', 'monitored', 'tags', 'nextAiring', 'previousAiring',
+    ('seasons', ('seasonNumber', 'monitored')),
+    ('statistics', ('episodeCount', 'totalEpisodeCount', 'episodeFileCount', 'sizeOnDisk'))
+)
+EPISODE_FIELDS = ('id', 'seriesId', 'seasonNumber', 'episodeNumber', 'airDateUtc', 'hasFile', 'monitored')
+
+
+_resolved_urls_lock = threading.Lock()
+
+
+def _get_resolved_urls_file():
+    return os.path.join(get_cache_directory(), 'sonarr_urls.json')
+
+
+def _load_resolved_urls():
+    try:
+        with open(_get_resolved_urls_file(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_resolved_url(base_url, api_url):
+    """Remember the API URL found for a configured Sonarr URL"""
+    with _resolved_urls_lock:
+        resolved_urls = _load_resolved_urls()
+        if resolved_urls.get(base_url) == api_url:
+            return
+        resolved_urls[base_url] = api_url
+        resolved_urls_file = _get_resolved_urls_file()
+        try:
+            temp_file = f"{resolved_urls_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(resolved_urls, f, indent=2)
+            os.replace(temp_file, resolved_urls_file)
+        except OSError as e:
+            print(f"{ORANGE}Warning: Could not save the Sonarr API URL: {str(e)}{RESET}")
+
+
+def _probe_sonarr_api(api_url, api_key, timeout=90):
+    """Check whether Sonarr's API answers at api_url, returning None if it does or the reason it doesn't"""
+    try:
+        headers = {"X-Api-Key": api_key}
+        response = http_get(f"{api_url}/health", headers=headers, timeout=(PROBE_CONNECT_TIMEOUT, timeout))
+        if response.status_code == 200:
+            return None
+        return f"HTTP {response.status_code}"
+    except requests.exceptions.RequestException as e:
+        return str(e)
 
 
 def process_sonarr_url(base_url, api_key, timeout=90):
-    """Process and validate Sonarr URL, trying different API paths"""
+    """Process and validate Sonarr URL, trying different API paths.
+
+    All API paths are probed at the same time and the first one that answers is used. It is
+    remembered between runs, so later runs need a single /health call unless Sonarr moved.
+    """
     base_url = base_url.rstrip('/')
     
     if base_url.startswith('http'):
@@ -15,44 +94,50 @@ def process_sonarr_url(base_url, api_key, timeout=90):
         if next_slash != -1:
             base_url = base_url[:next_slash]
     
-    api_paths = [
-        '/api/v3',
-        '/sonarr/api/v3'
-    ]
+    cached_url = _load_resolved_urls().get(base_url)
+    if cached_url and _probe_sonarr_api(cached_url, api_key, timeout) is None:
+        print(f"Successfully connected to Sonarr at: {cached_url}")
+        return cached_url
     
-    for path in api_paths:
+    # Daemon threads, so a probe hanging on a proxy doesn't hold up the run (or the exit) once another path answered
+    probe_results = queue.Queue()
+    for path in SONARR_API_PATHS:
         test_url = f"{base_url}{path}"
-        try:
-            headers = {"X-Api-Key": api_key}
-            response = requests.get(f"{test_url}/health", headers=headers, timeout=timeout)
-            if response.status_code == 200:
-                print(f"Successfully connected to Sonarr at: {test_url}")
-                return test_url
-        except requests.exceptions.RequestException as e:
-            print(f"{ORANGE}Testing URL {test_url} - Failed: {str(e)}{RESET}")
-            continue
+        threading.Thread(
+            target=lambda url: probe_results.put((url, _probe_sonarr_api(url, api_key, timeout))),
+            args=(test_url,), daemon=True
+        ).start()
+    
+    failures = []
+    for _ in SONARR_API_PATHS:
+        test_url, error = probe_results.get()
+        if error is None:
+            print(f"Successfully connected to Sonarr at: {test_url}")
+            _save_resolved_url(base_url, test_url)
+            return test_url
+        failures.append((test_url, error))
     
+    for test_url, error in failures:
+        print(f"{ORANGE}Testing URL {test_url} - Failed: {error}{RESET}")
     raise ConnectionError(f"{RED}Unable to establish connection to Sonarr. Tried the following URLs:\n" + 
-                        "\n".join([f"- {base_url}{path}" for path in api_paths]) + 
+                        "\n".join([f"- {base_url}{path}" for path in SONARR_API_PATHS]) + 
                         f"\nPlease verify your URL and API key and ensure Sonarr is running.{RESET}")
 
 
 def get_sonarr_series_and_tags(sonarr_url, api_key, timeout=90):
-    """Fetch all series and tags from Sonarr"""
+    """Fetch all series and tags from Sonarr, returning (None, {}) if they couldn't be fetched"""
     try:
         # Fetch series
         print(f"{BLUE}Fetching series from Sonarr...{RESET}", flush=True)
         series_url = f"{sonarr_url}/series"
         headers = {"X-Api-Key": api_key}
-        series_response = requests.get(series_url, headers=headers, timeout=timeout)
-        series_response.raise_for_status()
-        series_data = series_response.json()
+        series_data = http_get_json_items(series_url, SERIES_FIELDS, headers=headers, timeout=timeout)
         print(f"{GREEN}Done ✓ ({len(series_data)} series){RESET}")
 
         # Fetch tags
         print(f"{BLUE}Fetching tags from Sonarr...{RESET}", flush=True)
         tags_url = f"{sonarr_url}/tag"
-        tags_response = requests.get(tags_url, headers=headers, timeout=timeout)
+        tags_response = http_get(tags_url, headers=headers, timeout=timeout)
         tags_response.raise_for_status()
         tags_data = tags_response.json()
         print(f"{GREEN}Done ✓ ({len(tags_data)} tags){RESET}\n")
@@ -67,21 +152,197 @@ def get_sonarr_series_and_tags(sonarr_url, api_key, timeout=90):
     except requests.exceptions.RequestException as e:
         print(f"{ORANGE}Warning: Error connecting to Sonarr: {str(e)}{RESET}")
         print(f"{ORANGE}Continuing with empty series list...{RESET}")
-        return [], {}
+        return None, {}
 
 
 def get_sonarr_episodes(sonarr_url, api_key, series_id, timeout=90):
     """Fetch all episodes for a specific series from Sonarr"""
+    episodes = _fetch_sonarr_episodes(sonarr_url, api_key, series_id, timeout)
+    return episodes if episodes is not None else []
+
+
+def _fetch_sonarr_episodes(sonarr_url, api_key, series_id, timeout=90):
+    """Fetch all episodes for a specific series from Sonarr, returning None on errors"""
     try:
         url = f"{sonarr_url}/episode?seriesId={series_id}"
         headers = {"X-Api-Key": api_key}
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        return response.json()
+        return http_get_json_items(url, EPISODE_FIELDS, headers=headers, timeout=timeout)
+    except RequestRejected:
+        # Already reported once when the circuit breaker tripped or the deadline passed
+        return None
     except requests.exceptions.RequestException as e:
         print(f"{ORANGE}Warning: Error fetching episodes for series {series_id}: {str(e)}{RESET}")
         print(f"{ORANGE}Skipping this series and continuing...{RESET}")
-        return []
+        return None
+
+
+def get_series_episodes(sonarr_url, api_key, series, timeout=90, episode_cache=None, hedger=None):
+    """Get the episodes of a series from the episode cache or Sonarr.
+
+    Returns (episodes, from_cache), episodes is None if they couldn't be fetched. Episodes are
+    only fetched when the series changed since they were cached or the cached copy is too old.
+    Failed fetches are never cached. With a hedger (see new_hedger) slow fetches are sent twice.
+    """
+    if episode_cache:
+        episodes = load_cached_episodes(episode_cache, series)
+        if episodes is not None:
+            return episodes, True
+    
+    if hedger is not None:
+        episodes = hedged_call(hedger, _fetch_sonarr_episodes, sonarr_url, api_key, series['id'], timeout)
+    else:
+        episodes = _fetch_sonarr_episodes(sonarr_url, api_key, series['id'], timeout)
+    if episodes is None:
+        return None, False
+    
+    if episode_cache:
+        save_cached_episodes(episode_cache, series, episodes)
+    return episodes, False
+
+
+def _get_series_episodes_timed(sonarr_url, api_key, series, timeout=90, episode_cache=None, hedger=None):
+    """get_series_episodes, also returning how long it took in seconds"""
+    start = time.monotonic()
+    episodes, from_cache = get_series_episodes(sonarr_url, api_key, series, timeout, episode_cache, hedger)
+    return episodes, from_cache, time.monotonic() - start
+
+
+def iter_sonarr_episodes(sonarr_url, api_key, all_series, timeout=90, concurrency=1, series_ids=None, episode_cache=None,
+                         limiter=None, hedger=None):
+    """Yield (index, series, episodes) as soon as each series' episode list arrives.
+
+    index is the position of the series in all_series. With concurrency > 1 the requests run in a
+    bounded thread pool with at most `concurrency` in flight, so memory depends on the number of
+    requests in flight and not on the library size. Results are yielded in completion order.
+    episodes is None for series whose episodes couldn't be fetched. Only series in series_ids
+    are fetched when it is given. Unchanged series are served from episode_cache when it is enabled.
+    With a limiter (see new_concurrency_limiter) the number in flight follows its limit instead,
+    which adapts to the latency and errors of the requests. With a hedger (see new_hedger) requests
+    that take unusually long are duplicated and the first answer is used. Duplicates count against
+    the number in flight until they finish, also after the other request answered, but one sent
+    while all slots are taken goes above it until then.
+    """
+    indexed_series = [
+        (index, series) for index, series in enumerate(all_series)
+        if series_ids is None or series['id'] in series_ids
+    ]
+    series_count = 0
+    cached_count = 0
+    
+    if concurrency <= 1 and limiter is None:
+        for index, series in indexed_series:
+            if hedger is not None:
+                wait_for_extra_requests(hedger, 0)
+            episodes, from_cache = get_series_episodes(sonarr_url, api_key, series, timeout, episode_cache, hedger)
+            series_count += 1
+            cached_count += from_cache
+            yield index, series, episodes
+    else:
+        max_workers = limiter['maximum'] if limiter is not None else concurrency
+        unsubmitted_series = iter(indexed_series)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = {}
+
+            def get_limit():
+                return get_concurrency_limit(limiter) if limiter is not None else concurrency
+
+            def submit_up_to_limit():
+                in_flight = len(pending) + (count_extra_requests(hedger) if hedger is not None else 0)
+                for next_index, next_series in islice(unsubmitted_series, max(0, get_limit() - in_flight)):
+                    next_future = executor.submit(
+                        _get_series_episodes_timed, sonarr_url, api_key, next_series, timeout, episode_cache, hedger
+                    )
+                    pending[next_future] = (next_index, next_series)
+
+            submit_up_to_limit()
+            while pending or series_count < len(indexed_series):
+                if not pending:
+                    # Only duplicates of hedged requests are in flight, wait for room next to them
+                    wait_for_extra_requests(hedger, get_limit() - 1)
+                    submit_up_to_limit()
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, series = pending.pop(future)
+                    episodes, from_cache, latency = future.result()
+                    # Cache hits say nothing about how busy Sonarr is
+                    if limiter is not None and not from_cache:
+                        record_request(limiter, latency, episodes is None)
+                    # Keep the pool busy while the caller processes this result
+                    submit_up_to_limit()
+                    series_count += 1
+                    cached_count += from_cache
+                    yield index, series, episodes
+    
+    if episode_cache:
+        print(f"Episode cache: {cached_count} of {series_count} series unchanged, {series_count - cached_count} fetched from Sonarr")
+
+
+def get_sonarr_calendar(sonarr_url, api_key, start, end, timeout=90):
+    """Fetch all episodes (monitored and unmonitored) airing between start and end from the Sonarr calendar"""
+    episodes = []
+    headers = {"X-Api-Key": api_key}
+    chunk_start = start
+    try:
+        while chunk_start < end:
+            chunk_end = min(chunk_start + timedelta(days=CALENDAR_CHUNK_DAYS), end)
+            params = {
+                "start": chunk_start.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "end": chunk_end.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "unmonitored": "true",
+                "includeSeries": "false"
+            }
+            episodes.extend(http_get_json_items(f"{sonarr_url}/calendar", EPISODE_FIELDS, headers=headers, params=params,
+                                                timeout=timeout))
+            chunk_start = chunk_end
+        return episodes
+    except requests.exceptions.RequestException as e:
+        print(f"{ORANGE}Warning: Error fetching calendar from Sonarr: {str(e)}{RESET}")
+        return None
+
+
+def iter_sonarr_calendar_episodes(sonarr_url, api_key, all_series, start, end, timeout=90, full_episode_lists=True, concurrency=1,
+                                  episode_cache=None, series_ids=None, limiter=None, hedger=None):
+    """Yield (index, series, episodes) for the series that have episodes airing between start and end.
+
+    Series without any episode in the calendar window cannot match a time-window category,
+    so they are never fetched. Candidate series get their full episode list when finale
+    detection needs it (full_episode_lists), otherwise the calendar episodes are used as is.
+    Falls back to fetching every series when the calendar cannot be loaded. Only series in
+    series_ids are considered when it is given.
+    """
+    print(f"{BLUE}Fetching calendar from Sonarr ({start.date().isoformat()} to {end.date().isoformat()})...{RESET}", flush=True)
+    calendar_episodes = get_sonarr_calendar(sonarr_url, api_key, start, end, timeout)
+    if calendar_episodes is None:
+        print(f"{ORANGE}Falling back to fetching episodes per series...{RESET}")
+        yield from iter_sonarr_episodes(sonarr_url, api_key, all_series, timeout, concurrency, series_ids, episode_cache, limiter,
+                                        hedger)
+        return
+    
+    if series_ids is None:
+        series_ids = {series['id'] for series in all_series}
+    calendar_by_series = {}
+    seen_episode_ids = set()
+    for ep in calendar_episodes:
+        # Episodes airing exactly on a chunk boundary are returned by both chunks
+        if ep.get('id') in seen_episode_ids:
+            continue
+        seen_episode_ids.add(ep.get('id'))
+        
+        series_id = ep.get('seriesId')
+        if series_id in series_ids:
+            calendar_by_series.setdefault(series_id, []).append(ep)
+    print(f"{GREEN}Done ✓ ({len(calendar_episodes)} episodes for {len(calendar_by_series)} series){RESET}\n")
+    
+    if full_episode_lists:
+        yield from iter_sonarr_episodes(
+            sonarr_url, api_key, all_series, timeout, concurrency, set(calendar_by_series), episode_cache, limiter, hedger
+        )
+        return
+    
+    for index, series in enumerate(all_series):
+        if series['id'] in calendar_by_series:
+            yield index, series, calendar_by_series.pop(series['id'])
 
 
 def has_ignore_finale_tag(series, ignore_finales_tags, tag_mapping):
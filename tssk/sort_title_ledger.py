@@ -0,0 +1,95 @@
+"""Sort title ledger for TSSK - the Plex items TSSK gave a sort title, so they can be updated and reset without scanning libraries"""
+
+import json
+import os
+import time
+
+from .constants import ORANGE, RESET
+from .config_loader import get_cache_directory, get_instance_key
+
+
+# Bump whenever the stored entry fields change, so older ledgers are rebuilt
+SORT_TITLE_LEDGER_VERSION = 1
+
+DEFAULT_FULL_SCAN_HOURS = 168
+
+
+def get_sort_title_ledger(config, plex_url):
+    """Load the sort title ledger of a Plex server, or None if it is disabled.
+
+    Its entries are None when the ledger has to be (re)built with a full library scan: when there
+    is none yet or its last full scan is older than sort_title_ledger_full_scan_hours. The full
+    scan also picks up sort titles changed outside TSSK. unmatched holds the matched shows the last
+    full scan didn't find in Plex.
+    """
+    if str(config.get('sort_title_ledger', 'false')).lower() != 'true':
+        return None
+
+    ledger_file = os.path.join(get_cache_directory('plex'), f"{get_instance_key(plex_url)}_sort_titles.json")
+    try:
+        with open(ledger_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+
+    if stored.get('version') != SORT_TITLE_LEDGER_VERSION:
+        stored = {}
+    full_scan_seconds = float(config.get('sort_title_ledger_full_scan_hours', DEFAULT_FULL_SCAN_HOURS)) * 3600
+    entries = None
+    if time.time() - stored.get('scanned_at', 0) <= full_scan_seconds:
+        entries = dict(stored.get('items', {}))
+
+    return {
+        'file': ledger_file,
+        'scanned_at': stored.get('scanned_at', 0),
+        'entries': entries,
+        'stored_entries': stored.get('items', {}),
+        'unmatched': set(stored.get('unmatched', []))
+    }
+
+
+def start_ledger_scan(ledger):
+    """Empty the ledger before it is rebuilt from a full library scan"""
+    ledger['entries'] = {}
+    ledger['scan_started_at'] = time.time()
+
+
+def finish_ledger_scan(ledger, complete, unmatched_tvdb_ids):
+    """Finish rebuilding the ledger from a full library scan.
+
+    unmatched_tvdb_ids are the matched shows the scan didn't find in Plex, which later runs don't
+    need to scan again for. A scan that couldn't read every library keeps the previous entries
+    (updated with what the scan found) and last scan time, so the next run scans again.
+    """
+    if complete:
+        ledger['scanned_at'] = ledger['scan_started_at']
+        ledger['unmatched'] = set(unmatched_tvdb_ids)
+    else:
+        ledger['entries'] = {**ledger['stored_entries'], **ledger['entries']}
+
+
+def record_sort_title(ledger, rating_key, tvdb_id, title, sort_title):
+    """Record a TSSK sort title on a Plex item, with the item's title to reset it to"""
+    ledger['entries'][str(rating_key)] = {'tvdbId': str(tvdb_id), 'title': title, 'sortTitle': sort_title}
+
+
+def forget_sort_title(ledger, rating_key):
+    """Drop a Plex item whose TSSK sort title was reset"""
+    ledger['entries'].pop(str(rating_key), None)
+
+
+def save_sort_title_ledger(ledger):
+    """Write the sort title ledger"""
+    stored = {
+        'version': SORT_TITLE_LEDGER_VERSION,
+        'scanned_at': ledger['scanned_at'],
+        'items': ledger['entries'],
+        'unmatched': sorted(ledger['unmatched'])
+    }
+    try:
+        temp_file = f"{ledger['file']}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, separators=(',', ':'))
+        os.replace(temp_file, ledger['file'])
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not write sort title ledger: {str(e)}{RESET}")
@@ -0,0 +1,114 @@
+"""Per-series episode timeline for TSSK - built once per series and shared by all categories"""
+
+from datetime import timedelta
+
+from .utils import convert_utc_to_local
+
+
+def get_episode_air_date(ep, utc_offset):
+    """Parse the air date of an episode, or None if it has none"""
+    air_date_str = ep.get('airDateUtc')
+    if not air_date_str:
+        return None
+    return convert_utc_to_local(air_date_str, utc_offset)
+
+
+def format_air_date_key(moment):
+    """Format a UTC moment as an air date key, e.g. '2024-01-31T21:00:00' (with microseconds if it has any)"""
+    return moment.replace(tzinfo=None).isoformat()
+
+
+def get_air_date_key(air_date_str):
+    """Get the key of an airDateUtc string - keys sort in air date order, so windows can be checked without parsing"""
+    # Sonarr's usual 'YYYY-MM-DDTHH:MM:SSZ' only needs its 'Z' dropped
+    if len(air_date_str) == 20 and air_date_str[10] == 'T' and air_date_str[19] == 'Z':
+        return air_date_str[:19]
+    return format_air_date_key(convert_utc_to_local(air_date_str, 0))
+
+
+def build_series_timeline(episodes, now_local, utc_offset=0):
+    """Build the timeline every category is decided from, in a single pass over the episodes.
+
+    Specials (season 0) are left out. The timeline holds:
+    - seasons: season number -> episode_count, max_episode and downloaded_count, in the order
+      the seasons first appear
+    - next_future: (episode, air_date) of the first episode airing after now_local that isn't
+      downloaded (the earliest in episode order on ties), or None
+    - season_finales: (season number, episode number, episode, air_date) of the downloaded
+      finales of seasons with more than one episode
+    - latest_season: highest season with downloaded episodes, or None
+    - last_downloaded / first_of_latest_season: (episode, air_date) of the highest and lowest
+      numbered downloaded episode of latest_season
+    Air dates are only parsed for episodes that can be used by a category, the search for the next
+    future episode compares air date keys against now_local's key.
+    """
+    now_key = format_air_date_key(now_local - timedelta(hours=utc_offset))
+    seasons = {}
+    downloaded_episodes = {}
+    next_future_episode = None
+    next_future_key = None
+
+    for ep in episodes:
+        season_number = ep.get('seasonNumber', 0)
+        if season_number <= 0:
+            continue
+
+        episode_number = ep.get('episodeNumber', 0)
+        season = seasons.get(season_number)
+        if season is None:
+            season = {'episode_count': 0, 'max_episode': episode_number, 'downloaded_count': 0}
+            seasons[season_number] = season
+            downloaded_episodes[season_number] = []
+        season['episode_count'] += 1
+        if episode_number > season['max_episode']:
+            season['max_episode'] = episode_number
+
+        # Downloaded episodes are treated as if they've aired
+        if ep.get('hasFile', False):
+            season['downloaded_count'] += 1
+            downloaded_episodes[season_number].append(ep)
+            continue
+
+        air_date_str = ep.get('airDateUtc')
+        if not air_date_str:
+            continue
+        air_date_key = get_air_date_key(air_date_str)
+        if air_date_key > now_key and (next_future_key is None or air_date_key < next_future_key):
+            next_future_episode = ep
+            next_future_key = air_date_key
+
+    next_future = None
+    if next_future_episode is not None:
+        next_future = (next_future_episode, get_episode_air_date(next_future_episode, utc_offset))
+
+    season_finales = []
+    for season_number, season in seasons.items():
+        # Only consider it a finale if there are multiple episodes in the season
+        if season['episode_count'] <= 1:
+            continue
+        for ep in downloaded_episodes[season_number]:
+            if ep.get('episodeNumber') == season['max_episode']:
+                season_finales.append((season_number, season['max_episode'], ep, get_episode_air_date(ep, utc_offset)))
+                break
+
+    latest_season = max((number for number, season in seasons.items() if season['downloaded_count']), default=None)
+    last_downloaded = None
+    first_of_latest_season = None
+    if latest_season is not None:
+        downloaded = downloaded_episodes[latest_season]
+        max_episode_num = max(ep.get('episodeNumber', 0) for ep in downloaded)
+        for ep in downloaded:
+            if ep.get('episodeNumber') == max_episode_num:
+                last_downloaded = (ep, get_episode_air_date(ep, utc_offset))
+                break
+        first_episode = min(downloaded, key=lambda ep: ep.get('episodeNumber', 999))
+        first_of_latest_season = (first_episode, get_episode_air_date(first_episode, utc_offset))
+
+    return {
+        'seasons': seasons,
+        'next_future': next_future,
+        'season_finales': season_finales,
+        'latest_season': latest_season,
+        'last_downloaded': last_downloaded,
+        'first_of_latest_season': first_of_latest_season
+    }
@@ -0,0 +1,215 @@
+"""Transition-time index for TSSK - reuses last run's classification of series that can't have changed"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from .constants import ORANGE, RESET
+from .config_loader import get_cache_directory, get_instance_key
+from .episode_cache import get_series_fingerprint
+from .prefilter import get_window_padding, FUTURE_CATEGORIES
+from .utils import convert_utc_to_local
+
+
+# Bump whenever the classifiers change, so results of older versions are never reused
+TRANSITION_INDEX_VERSION = 1
+
+DEFAULT_MAX_AGE_HOURS = 24
+
+
+def get_transition_index(config, sonarr_url, settings):
+    """Load the transition index of a Sonarr instance, or None if it is disabled.
+
+    settings holds everything the classification depends on besides the series and the time
+    (category windows, UTC offset, ...). Entries from runs with other settings are dropped.
+    """
+    if str(config.get('transition_index', 'false')).lower() != 'true':
+        return None
+
+    index_file = os.path.join(get_cache_directory('transitions'), f"{get_instance_key(sonarr_url)}.json")
+    settings_key = json.dumps([TRANSITION_INDEX_VERSION, settings], sort_keys=True)
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+    except (OSError, ValueError):
+        stored = {}
+
+    return {
+        'file': index_file,
+        'settings': settings_key,
+        'max_age_hours': float(config.get('transition_index_max_age_hours', DEFAULT_MAX_AGE_HOURS)),
+        'entries': stored.get('series', {}) if stored.get('settings') == settings_key else {},
+        'updated_entries': {}
+    }
+
+
+def get_series_key(series, tag_mapping):
+    """Build a key from every /series field the classification of a series depends on"""
+    return json.dumps([
+        get_series_fingerprint(series),
+        series.get('title'),
+        series.get('tvdbId'),
+        series.get('status'),
+        sorted(tag_mapping.get(tag_id, '') for tag_id in series.get('tags', []))
+    ])
+
+
+def get_next_transition(timeline, category_windows, utc_offset, now_utc):
+    """Get the first moment after now_utc at which time alone can change the classification of a timeline.
+
+    Categories only compare a handful of air dates against now and the window edges: the next
+    future episode, the downloaded season finales and the first and last downloaded episode of the
+    latest season. The moments these comparisons flip are collected for every window; extra
+    moments only cause an early re-evaluation. Returns None if nothing can change over time.
+    """
+    offset = timedelta(hours=utc_offset)
+    now_local = now_utc + offset
+
+    air_dates = []
+    downloaded_air_dates = [air_date for _, _, _, air_date in timeline['season_finales']]
+    for entry in (timeline['last_downloaded'], timeline['first_of_latest_season']):
+        if entry:
+            downloaded_air_dates.append(entry[1])
+    if timeline['next_future']:
+        air_dates.append(timeline['next_future'][1])
+    air_dates.extend(downloaded_air_dates)
+
+    moments = []
+    for air_date in air_dates:
+        if air_date is None:
+            continue
+        # Air dates are local times labelled as UTC, future windows end at UTC now + days
+        moments.append(air_date - offset)
+        for days in category_windows.values():
+            moments.append(air_date - timedelta(days=days))
+            moments.append(air_date - offset + timedelta(days=days))
+
+    # Downloaded episodes that haven't aired yet are reported with today's date
+    if any(air_date is not None and air_date > now_local for air_date in downloaded_air_dates):
+        next_midnight = datetime.combine(now_local.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+        moments.append(next_midnight - offset)
+
+    return min((moment for moment in moments if moment > now_utc), default=None)
+
+
+def split_reusable_series(transition_index, all_series, tag_mapping, dirty_series_ids=None):
+    """Split series into ones whose last classification is still valid and ones to classify again.
+
+    Returns ([(index, series, None, results)], ids of the series to fetch). A classification is
+    reused while the series is unchanged, its next transition hasn't passed and it isn't older
+    than the max age. Series in dirty_series_ids are always classified again.
+    """
+    now = time.time()
+    max_age_seconds = transition_index['max_age_hours'] * 3600
+    reused_series = []
+    fetch_ids = set()
+
+    for index, series in enumerate(all_series):
+        entry = transition_index['entries'].get(str(series['id']))
+        if (
+            entry
+            and series['id'] not in (dirty_series_ids or ())
+            and entry.get('key') == get_series_key(series, tag_mapping)
+            and (entry.get('next_transition') is None or now < entry['next_transition'])
+            and now - entry.get('classified_at', 0) < max_age_seconds
+        ):
+            results = {category: (matched_shows, skipped_shows) for category, (matched_shows, skipped_shows) in entry['results'].items()}
+            reused_series.append((index, series, None, results))
+            transition_index['updated_entries'][str(series['id'])] = entry
+        else:
+            fetch_ids.add(series['id'])
+
+    print(f"Transition index: {len(reused_series)} of {len(all_series)} series unchanged, {len(fetch_ids)} to classify")
+    return reused_series, fetch_ids
+
+
+def record_transitions(transition_index, classified_series, category_windows, utc_offset, tag_mapping):
+    """Store the results and next transition of every classified series while passing them through"""
+    now_utc = datetime.now(timezone.utc)
+
+    for index, series, timeline, results in classified_series:
+        # Series whose episodes couldn't be fetched are classified again next run
+        if timeline is not None:
+            next_transition = get_next_transition(timeline, category_windows, utc_offset, now_utc)
+            transition_index['updated_entries'][str(series['id'])] = {
+                'key': get_series_key(series, tag_mapping),
+                'next_transition': next_transition.timestamp() if next_transition else None,
+                'classified_at': time.time(),
+                'results': results
+            }
+        yield index, series, timeline, results
+
+
+def save_transition_index(transition_index):
+    """Write the entries of this run's series, dropping series that are gone or weren't classified"""
+    stored = {
+        'settings': transition_index['settings'],
+        'series': transition_index['updated_entries']
+    }
+    try:
+        temp_file = f"{transition_index['file']}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, separators=(',', ':'))
+        os.replace(temp_file, transition_index['file'])
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not write transition index: {str(e)}{RESET}")
+
+
+def new_schedule():
+    """Create the state the next transition of a whole run is collected in"""
+    return {'next_transition': None, 'classified_ids': set()}
+
+
+def note_transition(schedule, moment):
+    """Keep moment in schedule if it's earlier than its next transition so far"""
+    if moment is not None and (schedule['next_transition'] is None or moment < schedule['next_transition']):
+        schedule['next_transition'] = moment
+
+
+def track_next_transition(schedule, classified_series, category_windows, utc_offset, transition_index=None):
+    """Keep the earliest next transition of all classified series in schedule while passing them through.
+
+    With a transition index the transitions it already holds for these series are used.
+    """
+    now_utc = datetime.now(timezone.utc)
+
+    for index, series, timeline, results in classified_series:
+        schedule['classified_ids'].add(series['id'])
+        entry = transition_index['updated_entries'].get(str(series['id'])) if transition_index else None
+        if entry is not None:
+            if entry.get('next_transition') is not None:
+                note_transition(schedule, datetime.fromtimestamp(entry['next_transition'], timezone.utc))
+        elif timeline is not None:
+            note_transition(schedule, get_next_transition(timeline, category_windows, utc_offset, now_utc))
+        yield index, series, timeline, results
+
+
+def note_unclassified_transitions(schedule, all_series, category_windows, utc_offset):
+    """Account for series that weren't classified (pre-filtered or outside the calendar) becoming relevant.
+
+    Such a series can only start matching once Sonarr's nextAiring gets within a future window, so
+    that moment (with the same padding as the pre-filter and calendar) is a transition.
+    """
+    future_windows = [days for category, days in category_windows.items() if category in FUTURE_CATEGORIES]
+    if not future_windows:
+        return
+    now_utc = datetime.now(timezone.utc)
+    lead_time = timedelta(days=max(future_windows)) + get_window_padding(utc_offset)
+
+    for series in all_series:
+        if series['id'] in schedule['classified_ids']:
+            continue
+        try:
+            next_airing = convert_utc_to_local(series.get('nextAiring'), 0)
+        except ValueError:
+            continue
+        if next_airing is not None and next_airing - lead_time > now_utc:
+            note_transition(schedule, next_airing - lead_time)
+
+
+def note_next_midnight(schedule, utc_offset):
+    """Account for relative dates ('today', 'tomorrow', weekdays) shifting at the next local midnight"""
+    now_local = datetime.now(timezone.utc) + timedelta(hours=utc_offset)
+    next_midnight = datetime.combine(now_local.date() + timedelta(days=1), datetime.min.time(), timezone.utc)
+    note_transition(schedule, next_midnight - timedelta(hours=utc_offset))
@@ -1,38 +1,105 @@
 """Utility functions for TSSK"""
 
-import requests
+import json
+import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
 
 from .constants import VERSION, GREEN, ORANGE, RESET
+from .config_loader import get_cache_directory
+from .http_client import http_get
 
 
-def check_for_updates():
-    """Check GitHub for newer versions of TSSK"""
-    print(f"Checking for updates to TSSK {VERSION}...")
-    
+# How long the result of an update check is reused before GitHub is asked again
+UPDATE_CHECK_TTL_HOURS = 24
+
+
+def _get_update_check_file():
+    return os.path.join(get_cache_directory(), 'update_check.json')
+
+
+def _fetch_latest_release(update_check):
+    """Ask GitHub for the latest release and store the result, runs in a background thread"""
+    result = {'checked_at': time.time()}
     try:
-        response = requests.get(
+        response = http_get(
             "https://api.github.com/repos/netplexflix/TV-show-status-for-Kometa/releases/latest",
+            retries=0,
             timeout=10
         )
         response.raise_for_status()
         
         latest_release = response.json()
-        latest_version = latest_release.get("tag_name", "").lstrip("v")
-        
-        def parse_version(version_str):
-            return tuple(map(int, version_str.split('.')))
-        
-        current_version_tuple = parse_version(VERSION)
-        latest_version_tuple = parse_version(latest_version)
-        
-        if latest_version and latest_version_tuple > current_version_tuple:
+        result['latest_version'] = latest_release.get("tag_name", "").lstrip("v")
+        result['html_url'] = latest_release.get('html_url', '')
+        result['body'] = latest_release.get('body', 'No release notes available')
+    except Exception as e:
+        result['error'] = str(e)
+
+    # Failed checks are stored too, so hosts without internet access don't retry every run
+    try:
+        with open(_get_update_check_file(), 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+    except OSError:
+        pass
+    update_check['result'] = result
+    update_check['done'].set()
+
+
+def check_for_updates(config=None):
+    """Start checking GitHub for newer versions of TSSK without blocking the run.
+
+    The result is kept in config/cache for UPDATE_CHECK_TTL_HOURS, so GitHub is asked at most once
+    per TTL, in a background thread. Returns the state to pass to report_update_check, or None if
+    update checks are disabled with check_for_updates: false or the TSSK_SKIP_UPDATE_CHECK env var.
+    """
+    if config is not None and str(config.get('check_for_updates', 'true')).lower() != 'true':
+        return None
+    if os.getenv('TSSK_SKIP_UPDATE_CHECK', 'false').lower() == 'true':
+        return None
+
+    update_check = {'result': None, 'cached': False, 'done': threading.Event()}
+    try:
+        with open(_get_update_check_file(), 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if time.time() - cached.get('checked_at', 0) < UPDATE_CHECK_TTL_HOURS * 3600:
+            update_check['result'] = cached
+            update_check['cached'] = True
+            update_check['done'].set()
+            return update_check
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    threading.Thread(target=_fetch_latest_release, args=(update_check,), daemon=True).start()
+    return update_check
+
+
+def report_update_check(update_check):
+    """Print the result of the update check, if it has finished by now - a run never waits for it"""
+    if update_check is None or not update_check['done'].is_set():
+        return
+    result = update_check['result']
+
+    if result.get('error'):
+        # Don't repeat a failed check's warning on every run until it is retried
+        if update_check['cached']:
+            return
+        print(f"{ORANGE}Could not check for updates: {result['error']}{RESET}\n")
+        return
+
+    def parse_version(version_str):
+        return tuple(map(int, version_str.split('.')))
+
+    try:
+        latest_version = result.get('latest_version', '')
+        if latest_version and parse_version(latest_version) > parse_version(VERSION):
             print(f"{ORANGE}A newer version of TSSK is available: {latest_version}{RESET}")
-            print(f"{ORANGE}Download: {latest_release.get('html_url', '')}{RESET}")
-            print(f"{ORANGE}Release notes: {latest_release.get('body', 'No release notes available')}{RESET}\n")
+            print(f"{ORANGE}Download: {result.get('html_url', '')}{RESET}")
+            print(f"{ORANGE}Release notes: {result.get('body', 'No release notes available')}{RESET}\n")
         else:
             print(f"{GREEN}You are running the latest version of TSSK.{RESET}\n")
-    except Exception as e:
+    except ValueError as e:
         print(f"{ORANGE}Could not check for updates: {str(e)}{RESET}\n")
 
 
@@ -0,0 +1,198 @@
+"""Sonarr webhook receiver for TSSK - marks the series of incoming events dirty for the next run"""
+
+import base64
+import hmac
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from .constants import GREEN, ORANGE, BLUE, RESET
+from .config_loader import get_cache_directory
+
+
+DEFAULT_WEBHOOK_HOST = '127.0.0.1'
+DEFAULT_WEBHOOK_PORT = 8585
+DEFAULT_DEBOUNCE_SECONDS = 60
+
+# Settings the receiver is started with, it is restarted when one of them changes
+WEBHOOK_SETTINGS = ('webhook_enabled', 'webhook_host', 'webhook_port', 'webhook_token')
+
+# Largest request body accepted, Sonarr's payloads are a few KB
+MAX_PAYLOAD_BYTES = 1024 * 1024
+
+_dirty_lock = threading.Lock()
+
+
+def get_dirty_series_file():
+    """Get the file the dirty series ids are kept in until the next run"""
+    return os.path.join(get_cache_directory('webhook'), 'dirty_series.json')
+
+
+def get_event_series_ids(payload):
+    """Get the ids of the series a Sonarr webhook payload is about (none for e.g. Test events)"""
+    # Sonarr's Test event comes with a made-up series
+    if not isinstance(payload, dict) or payload.get('eventType') == 'Test':
+        return set()
+    series = payload.get('series')
+    if isinstance(series, dict):
+        series = [series]
+    if not isinstance(series, list):
+        return set()
+    return {item['id'] for item in series if isinstance(item, dict) and isinstance(item.get('id'), int)}
+
+
+def _read_dirty_series(dirty_file):
+    try:
+        with open(dirty_file, 'r', encoding='utf-8') as f:
+            return {int(series_id): marked_at for series_id, marked_at in json.load(f).items()}
+    except (OSError, ValueError, TypeError, AttributeError):
+        return {}
+
+
+def _write_dirty_series(dirty_file, dirty_series):
+    try:
+        temp_file = f"{dirty_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump({str(series_id): marked_at for series_id, marked_at in sorted(dirty_series.items())}, f)
+        os.replace(temp_file, dirty_file)
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not write dirty series: {str(e)}{RESET}")
+
+
+def mark_series_dirty(series_ids):
+    """Add series ids to the dirty set on disk, so they survive until a run has classified them again"""
+    dirty_file = get_dirty_series_file()
+    marked_at = time.time()
+    with _dirty_lock:
+        dirty_series = _read_dirty_series(dirty_file)
+        dirty_series.update((series_id, marked_at) for series_id in series_ids)
+        _write_dirty_series(dirty_file, dirty_series)
+
+
+def get_dirty_series():
+    """Get the series marked dirty since the last completed run, as a dict of id to the time it was marked"""
+    with _dirty_lock:
+        return _read_dirty_series(get_dirty_series_file())
+
+
+def clear_dirty_series(dirty_series):
+    """Remove series from the dirty set once a run has classified them again.
+
+    dirty_series is what get_dirty_series returned at the start of the run; series marked again
+    since then stay dirty for the next run.
+    """
+    dirty_file = get_dirty_series_file()
+    with _dirty_lock:
+        remaining = {
+            series_id: marked_at for series_id, marked_at in _read_dirty_series(dirty_file).items()
+            if dirty_series.get(series_id) != marked_at
+        }
+        if remaining:
+            _write_dirty_series(dirty_file, remaining)
+        else:
+            try:
+                os.remove(dirty_file)
+            except OSError:
+                pass
+
+
+def _get_request_tokens(handler):
+    """Get the tokens a request carries: the token query parameter and the username and password of Basic auth"""
+    tokens = parse_qs(urlsplit(handler.path).query).get('token', [])
+    authorization = handler.headers.get('Authorization', '')
+    if authorization.lower().startswith('basic '):
+        try:
+            credentials = base64.b64decode(authorization[6:].strip()).decode('utf-8')
+        except ValueError:
+            credentials = ''
+        tokens.extend(part for part in credentials.split(':', 1) if part)
+    return tokens
+
+
+def _is_authorized(handler, token):
+    if not token:
+        return True
+    return any(hmac.compare_digest(candidate.encode('utf-8'), token.encode('utf-8'))
+               for candidate in _get_request_tokens(handler))
+
+
+def _create_handler(on_event, token):
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if not _is_authorized(self, token):
+                self.send_response(401)
+                self.send_header('WWW-Authenticate', 'Basic realm="TSSK"')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            try:
+                length = int(self.headers['Content-Length'])
+            except (TypeError, ValueError):
+                length = -1
+            # Without a valid length the body could only be read by waiting for the client to close the connection
+            if length < 0:
+                self.send_error(400, 'Missing or invalid Content-Length')
+                return
+            if length > MAX_PAYLOAD_BYTES:
+                self.send_error(413)
+                return
+            try:
+                payload = json.loads(self.rfile.read(length) or b'{}')
+            except ValueError:
+                self.send_error(400, 'Invalid JSON payload')
+                return
+
+            series_ids = get_event_series_ids(payload)
+            event_type = payload.get('eventType', 'Unknown') if isinstance(payload, dict) else 'Unknown'
+            if series_ids:
+                mark_series_dirty(series_ids)
+                print(f"{BLUE}Webhook: {event_type} event marked {len(series_ids)} series for the next run{RESET}", flush=True)
+                if on_event:
+                    on_event()
+            else:
+                print(f"Webhook: {event_type} event received", flush=True)
+
+            # Sonarr only checks for a 2xx response
+            self.send_response(200)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            # Events are already reported above
+            pass
+
+    return WebhookHandler
+
+
+def start_webhook_receiver(config, on_event=None):
+    """Start the webhook receiver in a background thread if it is enabled, returning the server or None.
+
+    Every POST with a Sonarr event adds its series to the dirty set and then calls on_event. When
+    webhook_token is set, requests have to carry it as the Basic auth username or password or as a
+    token query parameter; without a token the receiver only listens on the loopback interface.
+    """
+    if str(config.get('webhook_enabled', 'false')).lower() != 'true':
+        return None
+
+    host = str(config.get('webhook_host', DEFAULT_WEBHOOK_HOST))
+    port = int(config.get('webhook_port', DEFAULT_WEBHOOK_PORT))
+    token = str(config.get('webhook_token') or '')
+    if not token and host not in ('127.0.0.1', 'localhost', '::1'):
+        print(f"{ORANGE}Warning: Not starting webhook receiver on {host}:{port} without a webhook_token, "
+              f"set one or listen on 127.0.0.1{RESET}")
+        return None
+
+    try:
+        server = ThreadingHTTPServer((host, port), _create_handler(on_event, token))
+    except OSError as e:
+        print(f"{ORANGE}Warning: Could not start webhook receiver on {host}:{port}: {str(e)}{RESET}")
+        return None
+
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"{GREEN}Webhook receiver listening on {host}:{server.server_address[1]}{RESET}")
+    return server